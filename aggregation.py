@@ -0,0 +1,194 @@
+# File: aggregation.py
+# Description:
+# Summary tables over the rows of a query: medal counts per Team, athletes
+# per Year, and the mean and median Age, Height and Weight per Sport.
+# Every column is turned into integer group codes once (the category codes
+# of a categorical column), and a summary of any selection is then a few
+# np.bincount calls over the codes at its row positions. Medians come from a
+# bincount of (group, value) code pairs, which counts how often each value
+# occurs in each group, so nothing is sorted.
+#
+# Summaries are cached per query key. A filter on the column a summary is
+# grouped by only keeps or drops whole groups, so such a query is answered by
+# picking groups from the cached summary of the query without that filter,
+# with no rows looked at again.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from query_engine import Query
+from selection import take
+
+# CONSTANTS #
+MEDALS = ("Gold", "Silver", "Bronze")
+AVERAGED_COLUMNS = ("Age", "Height", "Weight")
+SUMMARY_CACHE_ENTRIES = 64
+# Medians are counted from a (group, value) table while it has at most this many cells
+MAX_MEDIAN_CELLS = 10**7
+
+
+# FUNCTIONS #
+def small_codes(codes, group_count):
+    # Codes in the narrowest integer type that holds them, which numpy sorts with a radix sort
+    for code_type in (np.int8, np.int16, np.int32):
+        if group_count < np.iinfo(code_type).max:
+            return codes.astype(code_type, copy=False)
+    return codes
+
+
+def distinct(values):
+    # The distinct values, by sorting and keeping the first of every run
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def group_medians(codes, value_codes, labels, group_count):
+    # Median per group code of the values whose sorted codes are value_codes (-1 where
+    # missing), NaN for groups without values. One bincount gives the number of rows of
+    # every value in every group, and the running totals along each group show which
+    # values sit in the middle, as np.median takes them
+    keep = (codes >= 0) & (value_codes >= 0)
+    value_count = len(labels)
+    labels = np.asarray(labels, dtype=np.float64)
+    if value_count == 0 or group_count * value_count > MAX_MEDIAN_CELLS:
+        medians = pd.Series(labels[value_codes[keep]]).groupby(codes[keep]).median()
+        return medians.reindex(range(group_count)).to_numpy(dtype=np.float64)
+    histogram = np.bincount(codes[keep].astype(np.int64) * value_count + value_codes[keep],
+        minlength=group_count * value_count)
+    totals = np.cumsum(histogram.reshape(group_count, value_count), axis=1)
+    counts = totals[:, -1]
+    # The value codes of the middle row, or of the two middle rows for an even count
+    lower = np.minimum((totals <= ((counts - 1) // 2)[:, None]).sum(axis=1), value_count - 1)
+    upper = np.minimum((totals <= (counts // 2)[:, None]).sum(axis=1), value_count - 1)
+    medians = (labels[lower] + labels[upper]) / 2
+    medians[counts == 0] = np.nan
+    return medians
+
+
+# CLASSES #
+class Summaries:
+    def __init__(self, engine, max_entries=SUMMARY_CACHE_ENTRIES):
+        self.engine = engine
+        self.dataset = engine.dataset
+        self.group_codes = {}
+        self.float_values = {}
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def codes(self, column):
+        # (code of every row, -1 where missing, and the value of each code), built once per column
+        if column not in self.group_codes:
+            series = self.dataset[column]
+            if series.dtype == "category":
+                self.group_codes[column] = (self.engine.index.value_codes(column), series.cat.categories)
+            else:
+                codes, labels = pd.factorize(series, sort=True)
+                self.group_codes[column] = (small_codes(codes, len(labels)), labels)
+        return self.group_codes[column]
+
+    def values(self, column):
+        if column not in self.float_values:
+            self.float_values[column] = self.dataset[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        return self.float_values[column]
+
+    def grouped(self, positions, by):
+        # Group codes of the selected rows and the number of possible groups
+        codes, labels = self.codes(by)
+        return take(codes, positions), len(labels)
+
+    def table(self, by, counts, columns):
+        # The groups that have rows, labelled, with one column per statistic
+        labels = self.codes(by)[1]
+        present = np.flatnonzero(counts)
+        frame = pd.DataFrame({by: np.asarray(labels)[present]})
+        for name, values in columns.items():
+            frame[name] = values[present]
+        return frame
+
+    def medals_per_team(self, positions):
+        teams, team_count = self.grouped(positions, "Team")
+        medal_codes, medal_labels = self.codes("Medal")
+        medals = take(medal_codes, positions)
+        won = (medals >= 0) & (teams >= 0)
+        # One bincount over (team, medal) pairs counts every medal of every team
+        pairs = np.bincount(teams[won].astype(np.int64) * len(medal_labels) + medals[won],
+            minlength=team_count * len(medal_labels))
+        pairs = pairs.reshape(team_count, len(medal_labels))
+        columns = {}
+        for medal in MEDALS:
+            found = np.flatnonzero(np.asarray(medal_labels) == medal)
+            columns[medal] = pairs[:, found[0]] if len(found) > 0 else np.zeros(team_count, dtype=np.int64)
+        columns["Total"] = pairs.sum(axis=1)
+        frame = self.table("Team", columns["Total"], columns)
+        return frame.sort_values(["Total", "Team"], ascending=[False, True], ignore_index=True)
+
+    def athletes_per_year(self, positions):
+        years, year_count = self.grouped(positions, "Year")
+        selected = years >= 0
+        entries = np.bincount(years[selected], minlength=year_count)
+        # An athlete taking part in several events of one Games is counted once
+        ids = take(self.dataset["ID"].to_numpy(), positions)[selected].astype(np.int64)
+        # Each (year, athlete) pair as a single integer, so one sort finds the distinct pairs
+        stride = ids.max(initial=0) + 1
+        pairs = distinct(years[selected].astype(np.int64) * stride + ids)
+        athletes = np.bincount(pairs // stride, minlength=year_count)
+        return self.table("Year", entries, {"Athletes": athletes, "Entries": entries})
+
+    def averages_per_sport(self, positions):
+        sports, sport_count = self.grouped(positions, "Sport")
+        selected = sports >= 0
+        entries = np.bincount(sports[selected], minlength=sport_count)
+        columns = {"Entries": entries}
+        for column in AVERAGED_COLUMNS:
+            values = take(self.values(column), positions)
+            present = selected & ~np.isnan(values)
+            counts = np.bincount(sports[present], minlength=sport_count)
+            sums = np.bincount(sports[present], weights=values[present], minlength=sport_count)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                columns[f"Mean {column.lower()}"] = np.round(sums / counts, 1)
+            value_codes, labels = self.codes(column)
+            medians = group_medians(sports, take(value_codes, positions), labels, sport_count)
+            columns[f"Median {column.lower()}"] = np.round(medians, 1)
+        return self.table("Sport", entries, columns)
+
+    def summary(self, name, query):
+        # The named summary of the rows matching query, as a DataFrame
+        by, function = self.summaries()[name]
+        key = (name, query.key())
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            # Filters on the grouped column pick whole groups from a cached broader summary
+            on_groups = [condition for condition in query.conditions if condition.column == by]
+            base_key = (name, Query(*(condition for condition in query.conditions if condition.column != by)).key())
+            base = self.entries.get(base_key) if len(on_groups) > 0 else None
+        if base is not None:
+            keep = np.ones(len(base), dtype=bool)
+            for condition in on_groups:
+                keep &= np.array([condition.matches(value) for value in base[by]], dtype=bool)
+            frame = base[keep].reset_index(drop=True)
+        else:
+            positions = self.engine.positions(query)
+            if positions is None:
+                positions = range(len(self.dataset))
+            frame = function(positions)
+        with self.lock:
+            self.entries[key] = frame
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return frame
+
+    def summaries(self):
+        # Summary name -> (column it is grouped by, function of the row positions)
+        return {
+            "Medals per Team": ("Team", self.medals_per_team),
+            "Athletes per Year": ("Year", self.athletes_per_year),
+            "Averages per Sport": ("Sport", self.averages_per_sport),
+        }
@@ -12,17 +12,28 @@
 # Every time the 'filter' button is pressed it filters the original dataset, 
 # not the data that was the result of the last filtering
 #
+# The Filter page also filters live while typing: shortly after the last key
+# press the number of matching rows is shown and the table is refreshed, with
+# Country and Sport matching everything that starts with the text typed so far.
+# Those two entries suggest the values that start with what has been typed
+#
+# The Stats page lists the time, rows and memory of recent operations, split
+# into their stages, once recording is switched on there or with --log
+#
 # NOTE:
 # There is a gap in the home page below the introductory text to include an image
 # In the HomePage class, create_widgets method, there is a block of code written to 
 # input an image, however, this has not worked in this application, will need to be worked on. 
 
 
-import sys
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import os
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import instrumentation
+from background import TaskRunner
+from export_formats import EXPORT_FORMATS, FORMAT_DESCRIPTIONS
+from selection import Selection
 
 # CONSTANTS #
 BUTTON_STYLE = ("Bahnschrift", 18, "bold")
@@ -33,23 +44,110 @@ GHOST_WHITE = "#fffaff"
 FRENCH_GREY = "#c9c9cf"
 PLATINUM = "#dfdfe2"
 SKY_BLUE = "#00b8f5"
-DATASET = pd.read_csv("athlete_events_shortened.csv")
+TABLE_COLUMNS = ("Sex", "Age", "Team", "Year", "Sport")
+TABLE_COLUMN_WIDTHS = (110, 110, 160, 160, 140)
+# The Table page shows the filtered rows or one of the summaries from aggregation.py
+TABLE_MODES = ("Rows", "Medals per Team", "Athletes per Year", "Averages per Sport")
+# Rows materialized above and below the visible part of the table
+TABLE_BUFFER_ROWS = 50
+# Rows per page of the Table page, "All" scrolls through every row without pages
+TABLE_PAGE_SIZES = ("All", "50", "100", "500", "1000")
+# Live filtering waits until no key has been pressed for this long
+LIVE_FILTER_DELAY_MS = 300
+MAX_SUGGESTIONS = 8
+# CSV files or glob patterns to load, replaced by any given on the command line:
+#     python athlete_dataset.py athlete_events.csv "games/*.csv"
+DATASET_PATHS = ["athlete_events_shortened.csv"]
+# JSON Lines file the operation timings are appended to, set with --log
+TIMING_LOG = None
+GRAPH_COLUMNS = ("Weight", "Height", "Age")
+# "Auto" draws a scatter for fewer than 100 rows and a histogram otherwise, as the original plot() did
+GRAPH_KINDS = ("Auto", "Histogram", "Scatter")
 
 # VARIABLES #
-filtered_dataset = pd.DataFrame()
+# The dataset is loaded on a worker thread once the window is showing, see load_data()
+ENGINE = None
+# Binned columns for the Graph page, only built once something is plotted
+PLOTS = None
+# Summary tables of filtered rows, also only set up once one is asked for
+SUMMARIES = None
+filtered_result = None
 current_filters = ""
 updated_dataset = False
 
 
 # FUNCTIONS #
+def load_data(task):
+    # pandas and numpy are imported here on the worker, so the window does not wait for them
+    from data_source import DataSource
+    with instrumentation.operation("load") as timing:
+        task.report(0, "Loading dataset")
+        # Each CSV is parsed once into a binary cache beside it, later launches memory-map
+        # it. The pages need the whole dataset indexed, so it is always loaded in memory mode
+        source = DataSource(DATASET_PATHS, mode="memory")
+        timing.stage("find files", rows=len(source.paths))
+        # The engine indexes the filter columns once and remembers recent results
+        engine = source.engine()
+        timing.stage("read", rows=len(engine.dataset))
+        timing.set_rows(len(engine.dataset))
+        return engine
+
+
+def data_loaded(engine):
+    global ENGINE
+    global filtered_result
+    from dataset_index import EMPTY_POSITIONS
+    ENGINE = engine
+    # Saving before any filter has been applied writes an empty file, as it always has
+    filtered_result = Selection(ENGINE.dataset, EMPTY_POSITIONS)
+    app.option.enable_data_pages()
+
+
+def data_failed(error):
+    messagebox.showerror("Error", f"The dataset could not be loaded:\n{error}")
+
+
 def save_file():
-    global filtered_dataset
-    filtered_dataset.to_csv("filtered_dataset.csv", index=False)
-    messagebox.showinfo("Data saved", "The current filtered dataset has been saved.")
+    path = filedialog.asksaveasfilename(
+        title="Save filtered dataset",
+        initialfile="filtered_dataset.csv",
+        defaultextension=".csv",
+        filetypes=[(FORMAT_DESCRIPTIONS[name], "*" + extension) for name, extension in EXPORT_FORMATS.items()],
+    )
+    if path == "":
+        return
+    if app.frame.displayed_only.get():
+        columns = TABLE_COLUMNS
+    else:
+        columns = None
+    # The rows are handed to the worker as they are now, a later filter does not change what is saved.
+    # They are read from the dataset chunk by chunk, the filtered rows are never copied as a whole
+    result = filtered_result
+    # While a summary is showing, the summary table is what gets saved
+    if app.frame.summary is not None:
+        result = Selection(app.frame.summary)
+        columns = None
+    app.runner.submit("save", lambda task: save_rows(result, path, columns, task), file_saved, file_not_saved)
+
+
+def save_rows(result, path, columns, task):
+    from data_export import export_rows
+    with instrumentation.operation("save", file=os.path.basename(path)) as timing:
+        row_count = export_rows(result.dataset, result.positions, path, columns=columns,
+            report=lambda fraction: task.report(fraction, "Saving"))
+        timing.set_rows(row_count)
+        return row_count
+
+
+def file_saved(row_count):
+    messagebox.showinfo("Data saved", f"The current filtered dataset has been saved.\n{row_count} rows were written")
+
+
+def file_not_saved(error):
+    messagebox.showerror("Error", f"The dataset could not be saved:\n{error}")
 
 
 def update():
-    global filtered_dataset
     global current_filters
     global updated_dataset
     current_frame = app.frame
@@ -58,47 +156,178 @@ def update():
     if updated_dataset == True:
         current_frame.filter_info.config(text="")
         current_frame.filter_info.config(text="Applied filters: " + current_filters)
+        current_frame.show_count(len(filtered_result))
         current_filters = ""
-        for item in current_frame.table.get_children():
-            current_frame.table.delete(item)
-        for i in range(len(filtered_dataset)):
-            current_frame.table.insert(parent = "", index = 1, values = (filtered_dataset.iloc[i, 1], filtered_dataset.iloc[i, 2], 
-                filtered_dataset.iloc[i, 3], filtered_dataset.iloc[i, 4], filtered_dataset.iloc[i, 5],))
+        # The table reads the rows it shows straight from the dataset, nothing is copied up front
+        current_frame.show_result(filtered_result)
     updated_dataset = False
 
 
-def sub_filter(df, filter, option):
-    sub_df = df[(df[filter] == option)]
-    return sub_df
+def summarise(result, name):
+    from query_engine import Query, Result
+    # Until a filter has been applied the whole dataset is summarised
+    if isinstance(result, Result):
+        query = result.query
+    else:
+        query = Query()
+    app.runner.submit("summary", lambda task: summary_table(query, name, task), summary_ready, summary_failed)
+
+
+def summary_table(query, name, task):
+    global SUMMARIES
+    from aggregation import Summaries
+    with instrumentation.operation("summary", summary=name) as timing:
+        task.report(0, "Summarising")
+        if SUMMARIES is None:
+            SUMMARIES = Summaries(ENGINE)
+        summary = SUMMARIES.summary(name, query)
+        timing.set_rows(len(summary))
+        return name, summary
+
+
+def summary_ready(summary):
+    app.frames[TablePage].show_summary(*summary)
+
+
+def summary_failed(error):
+    messagebox.showerror("Error", f"The summary could not be made:\n{error}")
+
+
+def sort_rows(result, column, descending):
+    # The order is taken from a permutation of the whole dataset, built on the first
+    # sort of a column, so later sorts never compare the values themselves again
+    app.runner.submit("sort", lambda task: sorted_rows(result, column, descending), rows_sorted, sort_failed)
+
+
+def sorted_rows(result, column, descending):
+    with instrumentation.operation("sort", column=column, descending=descending) as timing:
+        positions = ENGINE.index.sorted_positions(result.positions, column, descending)
+        timing.set_rows(len(positions))
+        return result, positions
+
+
+def rows_sorted(sorted_rows):
+    app.frames[TablePage].show_sorted(*sorted_rows)
+
+
+def sort_failed(error):
+    messagebox.showerror("Error", f"The table could not be sorted:\n{error}")
+
+
+def sub_filter(query, filter, option, prefix=False, timing=instrumentation.NO_OPERATION):
+    # The filters applied so far narrowed by one more, with the rows that match them.
+    # The engine answers from its cache or refines a cached result
+    from query_engine import Equals, Prefix
+    if prefix:
+        query = query.where(Prefix(filter, option))
+    else:
+        query = query.where(Equals(filter, option))
+    positions = ENGINE.positions(query)
+    timing.stage(filter, rows=len(positions))
+    return query, positions
+
+
+def plot_graph():
+    graph_page = app.frames[GraphPage]
+    column = graph_page.column_choice.get()
+    kind = graph_page.kind_choice.get()
+    # Until a filter has been applied the whole dataset is plotted
+    result = filtered_result
+    if len(result) == 0:
+        result = Selection(ENGINE.dataset)
+    # A newer plot supersedes one that is still being prepared
+    app.runner.submit("plot", lambda task: prepare_plot(result, column, kind, task), plot_ready, plot_failed)
+
+
+def prepare_plot(result, column, kind, task):
+    # Runs on a worker: the binning, and the first import of matplotlib, stay off the Tk thread
+    global PLOTS
+    from dataset_plots import DatasetPlots, plot_kind
+    # Imported here so that the first draw on the Tk thread finds matplotlib already loaded
+    import matplotlib.figure  # noqa: F401
+    with instrumentation.operation("plot", column=column) as timing:
+        task.report(0, "Preparing graph")
+        if PLOTS is None:
+            PLOTS = DatasetPlots(ENGINE.dataset)
+        kind = plot_kind(len(result), kind)
+        if kind == "Scatter":
+            data = PLOTS.scatter(result.positions, column)
+        else:
+            data = PLOTS.histogram(result.positions, column)
+        timing.set_rows(len(result))
+        task.check()
+        return kind, column, len(result), data
+
+
+def plot_ready(plot):
+    app.frames[GraphPage].draw(plot)
+
+
+def plot_failed(error):
+    messagebox.showerror("Error", f"The graph could not be drawn:\n{error}")
+
+
+def filter_inputs(filter_page):
+    # The entries are read here on the Tk thread, the filtering itself runs on a worker
+    return (
+        filter_page.sex_entry.get().strip().upper(),
+        filter_page.age_entry.get().strip(),
+        filter_page.country_entry.get().strip(),
+        filter_page.year_entry.get().strip(),
+        filter_page.sport_entry.get().strip(),
+    )
 
 
 def filter_dataset():
-    global DATASET
-    global filtered_dataset
-    global current_filters
-    global updated_dataset
-    filtered_dataset = DATASET.copy()
+    # Retrieve current frame as object to access Entry values from the FilterPage.
+    current_frame = app.frame
+    current_frame.cancel_live_filter()
+    inputs = filter_inputs(current_frame)
+    # A newer FILTER click supersedes any filtering that is still running
+    app.runner.submit("filter", lambda task: timed_filters(inputs, task), filters_applied, filter_failed)
+
+
+def live_filter():
+    filter_page = app.frames[FilterPage]
+    inputs = filter_inputs(filter_page)
+    # Moving between entries or pressing keys that do not edit them changes nothing
+    if inputs == filter_page.live_inputs:
+        return
+    filter_page.live_inputs = inputs
+    # Each run refines a cached result of the last one, so the rows that matched
+    # before are narrowed down rather than the whole dataset searched again
+    app.runner.submit("filter", lambda task: timed_filters(inputs, task, live=True), live_filters_applied, filter_failed)
+
+
+def timed_filters(inputs, task, live=False):
+    with instrumentation.operation("live filter" if live else "filter") as timing:
+        result = run_filters(inputs, task, live, timing)
+        timing.set_rows(len(result[0]))
+        return result
+
+
+def run_filters(inputs, task, live=False, timing=instrumentation.NO_OPERATION):
+    # With live set, Country and Sport match every value starting with the text entered.
+    # timing gets a stage for every filter applied
+    # filtered_query holds the filters applied so far
+    from query_engine import Query
+    filtered_query = Query()
+    applied_filters = ""
     errors = ""
     entered_filters = 0
     successful_filters = 0
-    # Retrieve current frame as object to access Entry values from the FilterPage
-    current_frame = app.frame
-
-    input_sex = current_frame.sex_entry.get().strip().upper()
-    input_age = current_frame.age_entry.get().strip()
-    input_country = current_frame.country_entry.get().strip()
-    input_year = current_frame.year_entry.get().strip()
-    input_sport = current_frame.sport_entry.get().strip()
+    input_sex, input_age, input_country, input_year, input_sport = inputs
 
     if input_sex != "":
         entered_filters += 1
         if input_sex == "F" or input_sex == "M":
-            filtered_dataset = sub_filter(filtered_dataset, "Sex", input_sex)
-            current_filters += f"Sex: {input_sex}, "
+            filtered_query, matches = sub_filter(filtered_query, "Sex", input_sex, timing=timing)
+            applied_filters += f"Sex: {input_sex}, "
             successful_filters += 1
         else:
             errors += "Input for sex must be 'M' or 'F'\n"
 
+    task.report(1 / 5, "Filtering")
     if input_age != "":
         entered_filters += 1
         try:
@@ -107,27 +336,31 @@ def filter_dataset():
             errors += "Input for age must be a number\n"
         else:
             if input_age > 0:
-                if sub_filter(filtered_dataset, "Age", input_age).size > 0:
-                    filtered_dataset = sub_filter(filtered_dataset, "Age", input_age)
-                    current_filters += f"Age: {input_age}, "
+                matches_query, matches = sub_filter(filtered_query, "Age", input_age, timing=timing)
+                if len(matches) > 0:
+                    filtered_query = matches_query
+                    applied_filters += f"Age: {input_age}, "
                     successful_filters += 1
                 else:
                     errors += f"There are no records matching {input_age}\n"
             else:
                 errors += "Input age must be greater than 0\n"
 
+    task.report(2 / 5, "Filtering")
     if input_country != "":
         entered_filters += 1
         if any(char.isdigit() for char in input_country) == False:
-            if sub_filter(filtered_dataset, "Team", input_country).size > 0:
-                filtered_dataset = sub_filter(filtered_dataset, "Team", input_country)
-                current_filters += f"Country: {input_country}, "
+            matches_query, matches = sub_filter(filtered_query, "Team", input_country, prefix=live, timing=timing)
+            if len(matches) > 0:
+                filtered_query = matches_query
+                applied_filters += f"Country: {input_country}, "
                 successful_filters += 1
             else:
                 errors += f"There are no records matching {input_country}\n"
         else:
             errors += "Input for country cannot contain numbers\n"
 
+    task.report(3 / 5, "Filtering")
     if input_year != "":
         entered_filters += 1
         try:
@@ -136,27 +369,43 @@ def filter_dataset():
             errors += "Input for year must only contain numbers\n"
         else:
             if input_year > 0:
-                if sub_filter(filtered_dataset, "Year", input_year).size > 0:
-                    filtered_dataset = sub_filter(filtered_dataset, "Year", input_year)
-                    current_filters += f"Year: {input_year}, "
+                matches_query, matches = sub_filter(filtered_query, "Year", input_year, timing=timing)
+                if len(matches) > 0:
+                    filtered_query = matches_query
+                    applied_filters += f"Year: {input_year}, "
                     successful_filters += 1
                 else:
                     errors += f"There are no records matching {input_year}\n"
             else:
                 errors += "Input year must be greater than 0\n"
 
+    task.report(4 / 5, "Filtering")
     if input_sport != "":
         entered_filters += 1
         if any(char.isdigit() for char in input_sport) == False:
-            if sub_filter(filtered_dataset, "Sport", input_sport).size > 0:
-                filtered_dataset = sub_filter(filtered_dataset, "Sport", input_sport)
-                current_filters += f"Sport: {input_sport}"
+            matches_query, matches = sub_filter(filtered_query, "Sport", input_sport, prefix=live, timing=timing)
+            if len(matches) > 0:
+                filtered_query = matches_query
+                applied_filters += f"Sport: {input_sport}"
                 successful_filters += 1
             else:
                 errors += f"There are no records matching {input_sport}\n"
         else:
             errors += "Input for sport cannot contain numbers\n"
 
+    task.check()
+    result = ENGINE.run(filtered_query)
+    # Evaluated here on the worker, so the Tk thread only gets the finished rows
+    result.count()
+    timing.stage("count", rows=len(result))
+    return result, applied_filters, errors, successful_filters, entered_filters
+
+
+def filters_applied(result):
+    global filtered_result
+    global current_filters
+    global updated_dataset
+    filtered_result, current_filters, errors, successful_filters, entered_filters = result
     updated_dataset = True
     if len(errors) > 0:
         messagebox.showwarning("Error", (errors + f"\n{successful_filters}/{entered_filters} filters were applied successfully"))
@@ -165,6 +414,25 @@ def filter_dataset():
             f"Data has been successfully filtered\n{successful_filters}/{entered_filters} filters were applied successfully")
 
 
+def live_filters_applied(result):
+    global filtered_result
+    global current_filters
+    global updated_dataset
+    filtered_result, applied_filters, errors, successful_filters, entered_filters = result
+    # The table is refreshed straight away, without waiting for UPDATE
+    table_page = app.frames[TablePage]
+    table_page.filter_info.config(text="Applied filters: " + applied_filters)
+    table_page.show_count(len(filtered_result))
+    table_page.show_result(filtered_result)
+    current_filters = ""
+    updated_dataset = False
+    app.frames[FilterPage].show_matches(len(filtered_result), errors)
+
+
+def filter_failed(error):
+    messagebox.showerror("Error", f"The dataset could not be filtered:\n{error}")
+
+
 # CLASSES (USER INTERFACE) #
 class Application(tk.Tk):
     def __init__(self, *args, **kwargs):
@@ -177,26 +445,35 @@ class Application(tk.Tk):
         self.option = OptionsBar(self, self, SKY_BLUE)
         self.test_value = 1
 
+        # Progress of the work running in the background, along the bottom of the window
+        self.status = StatusBar(self, self)
+        self.runner = TaskRunner(self, on_start=self.status.task_started,
+            on_progress=self.status.task_progress, on_finish=self.status.task_finished)
+
         # Container for each frame (page)
         container = tk.Frame(self, background=PLATINUM)
-        container.place(x=0, rely=0.15, relwidth=1, relheight=0.85)
+        container.place(x=0, rely=0.15, relwidth=1, relheight=0.8)
 
         container.grid_rowconfigure(0, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
         # Dictionary of frames
         self.frames = {}
-        for F in (HomePage, FilterPage, TablePage):
+        for F in (HomePage, FilterPage, TablePage, GraphPage, DiagnosticsPage):
             self.frame = F(container)
             self.frames[F] = self.frame
             self.frame.grid(row=0, column=0, sticky="nsew")
 
         self.show_frame(HomePage, self.option.home_indicate)
+        # The Filter and Table pages stay disabled until the data is ready
+        self.after_idle(lambda: self.runner.submit("load", load_data, data_loaded, data_failed, cancellable=False))
 
     def hide_all_indicators(self):
         self.option.home_indicate.config(bg=SKY_BLUE)
         self.option.filter_indicate.config(bg=SKY_BLUE)
         self.option.table_indicate.config(bg=SKY_BLUE)
+        self.option.graph_indicate.config(bg=SKY_BLUE)
+        self.option.diagnostics_indicate.config(bg=SKY_BLUE)
 
     def show_indicator(self, label):
         self.hide_all_indicators()
@@ -207,13 +484,15 @@ class Application(tk.Tk):
         self.frame = self.frames[container]
         # Raising the current frame to the top
         self.frame.tkraise()
+        if container is DiagnosticsPage:
+            self.frame.refresh()
 
 
 class OptionsBar(tk.Frame):
     def __init__(self, parent, controller, colour):
         super().__init__(master=parent, background=colour)
         self.place(x=0, y=0, relwidth=1, relheight=0.15)
-        self.columnconfigure((0, 1, 2), weight=1, uniform="a")
+        self.columnconfigure((0, 1, 2, 3, 4), weight=1, uniform="a")
         self.rowconfigure(0, weight=1, uniform="a")
         self.create_widgets(controller)
 
@@ -226,35 +505,104 @@ class OptionsBar(tk.Frame):
             background=SKY_BLUE,
             command=lambda: controller.show_frame(HomePage, self.home_indicate),
         )
-        filter_button = tk.Button(
+        self.filter_button = tk.Button(
             self,
             text="Filter",
+            state="disabled",
             bd=0,
             font=BUTTON_STYLE,
             background=SKY_BLUE,
             command=lambda: controller.show_frame(FilterPage, self.filter_indicate),
         )
-        table_button = tk.Button(
+        self.table_button = tk.Button(
             self,
             text="Table",
+            state="disabled",
             bd=0,
             font=BUTTON_STYLE,
             background=SKY_BLUE,
             command=lambda: controller.show_frame(TablePage, self.table_indicate),
         )
+        self.graph_button = tk.Button(
+            self,
+            text="Graph",
+            state="disabled",
+            bd=0,
+            font=BUTTON_STYLE,
+            background=SKY_BLUE,
+            command=lambda: controller.show_frame(GraphPage, self.graph_indicate),
+        )
+        # Timings of recent operations, available before the data has loaded so its loading shows up
+        diagnostics_button = tk.Button(
+            self,
+            text="Stats",
+            bd=0,
+            font=BUTTON_STYLE,
+            background=SKY_BLUE,
+            command=lambda: controller.show_frame(DiagnosticsPage, self.diagnostics_indicate),
+        )
 
+        # Each indicator is centred under the middle of its column, whatever the window width
         self.home_indicate = tk.Label(self, text="", background=SKY_BLUE)
-        self.home_indicate.place(x=84, y=65, width=64, height=5)
+        self.home_indicate.place(relx=1 / 10, y=65, width=64, height=5, anchor="n")
 
         self.filter_indicate = tk.Label(self, text="", background=SKY_BLUE)
-        self.filter_indicate.place(x=319, y=65, width=60, height=5)
+        self.filter_indicate.place(relx=3 / 10, y=65, width=60, height=5, anchor="n")
 
         self.table_indicate = tk.Label(self, text="", background=SKY_BLUE)
-        self.table_indicate.place(x=553, y=65, width=60, height=5)
+        self.table_indicate.place(relx=5 / 10, y=65, width=60, height=5, anchor="n")
+
+        self.graph_indicate = tk.Label(self, text="", background=SKY_BLUE)
+        self.graph_indicate.place(relx=7 / 10, y=65, width=66, height=5, anchor="n")
+
+        self.diagnostics_indicate = tk.Label(self, text="", background=SKY_BLUE)
+        self.diagnostics_indicate.place(relx=9 / 10, y=65, width=58, height=5, anchor="n")
 
         home_button.grid(row=0, column=0)
-        filter_button.grid(row=0, column=1)
-        table_button.grid(row=0, column=2)
+        self.filter_button.grid(row=0, column=1)
+        self.table_button.grid(row=0, column=2)
+        self.graph_button.grid(row=0, column=3)
+        diagnostics_button.grid(row=0, column=4)
+
+    def enable_data_pages(self):
+        self.filter_button.config(state="normal")
+        self.table_button.config(state="normal")
+        self.graph_button.config(state="normal")
+
+
+class StatusBar(tk.Frame):
+    def __init__(self, parent, controller):
+        super().__init__(master=parent, background=PLATINUM)
+        self.place(x=0, rely=0.95, relwidth=1, relheight=0.05)
+        self.controller = controller
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.status_label = tk.Label(self, text="", font=("Bahnschrift", 10, "normal"), background=PLATINUM)
+        self.status_label.pack(side="left", padx=10)
+        self.cancel_button = tk.Button(self, text="Cancel", font=("Bahnschrift", 10, "normal"), background=PLATINUM,
+            state="disabled", command=lambda: self.controller.runner.cancel())
+        self.cancel_button.pack(side="right", padx=10)
+        self.progress = ttk.Progressbar(self, orient="horizontal", mode="determinate", maximum=1.0, length=200)
+        self.progress.pack(side="right")
+
+    def task_started(self, task):
+        self.progress.config(value=0)
+        self.status_label.config(text="Working...")
+        self.cancel_button.config(state="normal")
+
+    def task_progress(self, task, fraction, text):
+        self.progress.config(value=fraction)
+        self.status_label.config(text=f"{text}...")
+
+    def task_finished(self, task):
+        # Another task may still be running after this one was superseded or cancelled
+        if not self.controller.runner.busy():
+            self.progress.config(value=0)
+            self.status_label.config(text="")
+            self.cancel_button.config(state="disabled")
+        if isinstance(self.controller.frame, DiagnosticsPage):
+            self.controller.frame.refresh()
 
 
 class HomePage(tk.Frame):
@@ -291,9 +639,12 @@ class FilterPage(tk.Frame):
     def __init__(self, parent):
         super().__init__(master=parent, background=PLATINUM)
         self.grid_rowconfigure(0, weight=1, uniform="a")
-        self.grid_rowconfigure((1, 2, 3, 4, 5, 6), weight=1, uniform="a")
+        self.grid_rowconfigure((1, 2, 3, 4, 5, 6, 7), weight=1, uniform="a")
         self.grid_columnconfigure(0, weight=1, uniform="b")
         self.grid_columnconfigure(1, weight=1, uniform="b")
+        self.pending_filter = None
+        self.live_inputs = None
+        self.suggestion_entry = None
         self.create_widgets()
 
     def create_widgets(self):
@@ -312,12 +663,31 @@ class FilterPage(tk.Frame):
         year_label = tk.Label(self, text="Year: ", font=FILTER_STYLE, background=PLATINUM)
         sport_label = tk.Label(self, text="Sport: ", font=FILTER_STYLE, background=PLATINUM)
         filter_button = tk.Button(self, text="FILTER", font=FILTER_STYLE, background=PLATINUM, command=filter_dataset)
+        self.match_info = tk.Label(self, text="", font=("Bahnschrift", 12, "normal"), background=PLATINUM)
         self.sex_entry = tk.Entry(self)
         self.age_entry = tk.Entry(self)
         self.country_entry = tk.Entry(self)
         self.year_entry = tk.Entry(self)
         self.sport_entry = tk.Entry(self)
 
+        # Every edit restarts the live filter delay, Country and Sport also update their suggestions
+        for entry in (self.sex_entry, self.age_entry, self.year_entry):
+            entry.bind("<KeyRelease>", lambda event: self.entry_changed())
+        self.country_entry.bind("<KeyRelease>", lambda event: self.entry_changed(event, "Team"))
+        self.sport_entry.bind("<KeyRelease>", lambda event: self.entry_changed(event, "Sport"))
+        # One list of suggestions, shown under whichever entry is being typed in
+        self.suggestions = tk.Listbox(self, height=MAX_SUGGESTIONS, font=("Bahnschrift", 11, "normal"))
+        self.suggestions.bind("<ButtonRelease-1>", lambda event: self.choose_suggestion())
+        self.suggestions.bind("<Return>", lambda event: self.choose_suggestion())
+        self.suggestions.bind("<Escape>", lambda event: self.leave_suggestions())
+        # The list covers the entries below it, so it is closed as soon as anything else is used
+        for widget in (self.country_entry, self.sport_entry, self.suggestions):
+            widget.bind("<FocusOut>", lambda event: self.after_idle(self.suggestions_focus_lost), add="+")
+        for widget in (self.sex_entry, self.age_entry, self.year_entry):
+            widget.bind("<FocusIn>", lambda event: self.hide_suggestions(), add="+")
+        for widget in (self, filter_button):
+            widget.bind("<Button-1>", lambda event: self.hide_suggestions(), add="+")
+
         label.grid(row=0, column=0, columnspan=2, sticky="nw")
         sex_label.grid(row=1, column=0, sticky="e")
         age_label.grid(row=2, column=0, sticky="e")
@@ -332,42 +702,512 @@ class FilterPage(tk.Frame):
         self.sport_entry.grid(row=5, column=1, sticky="w")
 
         filter_button.grid(row=6, column=0, columnspan=2)
+        self.match_info.grid(row=7, column=0, columnspan=2)
+
+    def entry_changed(self, event=None, column=None):
+        if column is not None:
+            showing = self.suggestion_entry is event.widget and self.suggestions.winfo_ismapped()
+            if event.keysym == "Down" and showing:
+                # Moves into the list of this entry, Return then picks the highlighted value
+                self.suggestions.focus_set()
+                self.suggestions.selection_set(0)
+                return
+            if event.keysym == "Escape":
+                self.hide_suggestions()
+            else:
+                self.suggest(event.widget, column)
+        self.cancel_live_filter()
+        self.pending_filter = self.after(LIVE_FILTER_DELAY_MS, self.run_live_filter)
+
+    def run_live_filter(self):
+        self.pending_filter = None
+        live_filter()
+
+    def cancel_live_filter(self):
+        if self.pending_filter is not None:
+            self.after_cancel(self.pending_filter)
+            self.pending_filter = None
+
+    def suggest(self, entry, column):
+        # Looked up on the Tk thread, two binary searches in the sorted values of the column
+        text = entry.get().strip()
+        values = []
+        if text != "":
+            values = ENGINE.index.values_with_prefix(column, text, MAX_SUGGESTIONS)
+        if len(values) == 0 or (len(values) == 1 and values[0] == text):
+            self.hide_suggestions()
+            return
+        self.suggestions.delete(0, tk.END)
+        self.suggestions.insert(tk.END, *values)
+        self.suggestions.config(height=len(values))
+        self.suggestion_entry = entry
+        self.suggestions.place(in_=entry, x=0, rely=1, relwidth=1)
+        self.suggestions.lift()
+
+    def choose_suggestion(self):
+        chosen = self.suggestions.curselection()
+        if len(chosen) == 0:
+            return
+        entry = self.suggestion_entry
+        entry.delete(0, tk.END)
+        entry.insert(0, self.suggestions.get(chosen[0]))
+        self.hide_suggestions()
+        entry.focus_set()
+        entry.icursor(tk.END)
+        self.cancel_live_filter()
+        live_filter()
+
+    def suggestions_focus_lost(self):
+        # Run once the focus has moved, moving between the entry and its list keeps it open
+        if self.focus_get() not in (self.suggestions, self.suggestion_entry):
+            self.hide_suggestions()
+
+    def leave_suggestions(self):
+        # Escape in the list closes it and goes back to typing
+        self.hide_suggestions()
+        self.suggestion_entry.focus_set()
+
+    def hide_suggestions(self):
+        # Emptied as well, so nothing is left to move into once the list is hidden
+        self.suggestions.place_forget()
+        self.suggestions.delete(0, tk.END)
+
+    def show_matches(self, row_count, errors):
+        # Only the first problem fits under the entries, FILTER still reports all of them
+        text = f"{row_count} matching rows"
+        if len(errors) > 0:
+            text += " - " + errors.splitlines()[0]
+        self.match_info.config(text=text)
 
 
 class TablePage(tk.Frame):
+    # The treeview is virtualized: it only ever holds enough items to fill the
+    # visible area, and scrolling rewrites their values from the dataset.
+    # `selection` holds the rows of the whole result, `offset` is the first
+    # of them on screen and `window` caches the materialized rows around it.
+    # In a summary mode the selection is every row of the summary table.
+    # Clicking a heading sorts by that column, clicking it again reverses the order
+    #
+    # With a page size chosen, `selection` is only the current page of `rows`,
+    # taken by offset and limit from its row positions, and the table scrolls
+    # within that page
     def __init__(self, parent):
         super().__init__(master=parent, background=PLATINUM)
         self.grid_columnconfigure((0, 1), weight=1, uniform="a")
         self.grid_rowconfigure(0, weight=1, uniform="a")
-        self.grid_rowconfigure(1, weight=9, uniform="a")
-        self.grid_rowconfigure(2, weight=1, uniform="a")
+        self.grid_rowconfigure(1, weight=8, uniform="a")
+        self.grid_rowconfigure((2, 3), weight=1, uniform="a")
+        self.reset_state()
         self.create_place_widgets()
 
+    def reset_state(self):
+        # What the table shows, apart from its widgets
+        self.rows = []
+        self.page = 0
+        self.selection = []
+        self.offset = 0
+        self.window = []
+        self.window_start = 0
+        self.columns = None
+        # The filter result last shown, and the summary of it when one is showing
+        self.result = None
+        self.summary = None
+        # (column, descending) of the last heading clicked, or None for the dataset's order
+        self.sort = None
+
     def create_place_widgets(self):
-        self.filter_info = tk.Label(self, text="Applied filters: ", font=("Bahnschrift", 12, "normal"), background=PLATINUM)
-        self.filter_info.grid(row=0, column=0, columnspan=2)
+        # The number of matching rows is shown beside the filters that were applied
+        info_frame = tk.Frame(self, background=PLATINUM)
+        info_frame.grid(row=0, column=0, columnspan=2)
+        self.filter_info = tk.Label(info_frame, text="Applied filters: ", font=("Bahnschrift", 12, "normal"), background=PLATINUM)
+        self.filter_info.pack(side="left")
+        self.count_info = tk.Label(info_frame, text="", font=("Bahnschrift", 12, "bold"), background=PLATINUM)
+        self.count_info.pack(side="left", padx=10)
+
+        # Page controls and the page size, below the table
+        page_frame = tk.Frame(self, background=PLATINUM)
+        page_frame.grid(row=2, column=0, columnspan=2)
+        for text, command in (("\u23ee", self.first_page), ("\u25c0", self.previous_page)):
+            tk.Button(page_frame, text=text, font=("Bahnschrift", 10, "normal"), background=PLATINUM,
+                width=3, command=command).pack(side="left")
+        self.page_info = tk.Label(page_frame, text="", font=("Bahnschrift", 10, "normal"), background=PLATINUM, width=24)
+        self.page_info.pack(side="left")
+        for text, command in (("\u25b6", self.next_page), ("\u23ed", self.last_page)):
+            tk.Button(page_frame, text=text, font=("Bahnschrift", 10, "normal"), background=PLATINUM,
+                width=3, command=command).pack(side="left")
+        tk.Label(page_frame, text="Page size", font=("Bahnschrift", 10, "normal"), background=PLATINUM).pack(side="left", padx=(15, 5))
+        self.page_size_choice = ttk.Combobox(page_frame, values=TABLE_PAGE_SIZES, state="readonly", width=6)
+        self.page_size_choice.set(TABLE_PAGE_SIZES[0])
+        self.page_size_choice.bind("<<ComboboxSelected>>", lambda event: self.show_page(0))
+        self.page_size_choice.pack(side="left")
+
+        # SAVE shares its cell with the choice of writing every column or only the five shown here
+        save_frame = tk.Frame(self, background=PLATINUM)
+        save_frame.grid(row=3, column=1, sticky="nsew")
+        self.displayed_only = tk.BooleanVar(self, value=False)
+        displayed_check = tk.Checkbutton(save_frame, text="Shown columns\nonly", variable=self.displayed_only,
+            font=("Bahnschrift", 9, "normal"), background=PLATINUM)
+        displayed_check.pack(side="right", fill="y")
+        save_button = tk.Button(save_frame, text="SAVE", font=("Bahnschrift", 12, "normal"), background=PLATINUM, command=save_file)
+        save_button.pack(side="left", fill="both", expand=True)
+
+        # UPDATE shares its cell with the choice between the rows and a summary of them
+        update_frame = tk.Frame(self, background=PLATINUM)
+        update_frame.grid(row=3, column=0, sticky="nsew")
+        self.mode_choice = ttk.Combobox(update_frame, values=TABLE_MODES, state="readonly", width=18)
+        self.mode_choice.set(TABLE_MODES[0])
+        self.mode_choice.bind("<<ComboboxSelected>>", lambda event: self.refresh())
+        self.mode_choice.pack(side="right", padx=5)
+        update_button = tk.Button(update_frame, text="UPDATE", font=("Bahnschrift", 12, "normal"), background=PLATINUM, command=update)
+        update_button.pack(side="left", fill="both", expand=True)
+
+        self.table = ttk.Treeview(self, show="headings")
+        self.set_columns(TABLE_COLUMNS, TABLE_COLUMN_WIDTHS)
+        self.table.grid(row=1, column=0, columnspan=2, sticky="nsw")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.scroll)
+        self.scrollbar.grid(row=1, column=1, sticky="nse")
+
+        self.table.bind("<Configure>", lambda event: self.render())
+        self.table.bind("<MouseWheel>", self.mouse_wheel)
+        self.table.bind("<Button-4>", lambda event: self.scroll_to(self.offset - 3))
+        self.table.bind("<Button-5>", lambda event: self.scroll_to(self.offset + 3))
+        self.table.bind("<Prior>", lambda event: self.scroll_to(self.offset - self.visible_rows()))
+        self.table.bind("<Next>", lambda event: self.scroll_to(self.offset + self.visible_rows()))
+
+    def set_columns(self, columns, widths):
+        if columns == self.columns:
+            return
+        self.columns = columns
+        identifiers = [f"c{number + 1}" for number in range(len(columns))]
+        self.table.config(columns=identifiers)
+        for identifier, name, width in zip(identifiers, columns, widths):
+            self.table.heading(identifier, text=name, command=lambda column=name: self.sort_by(column))
+            self.table.column(identifier, stretch=False, width=width)
+        self.show_sort_arrow()
+
+    def show_sort_arrow(self):
+        for number, name in enumerate(self.columns):
+            if self.sort is not None and self.sort[0] == name:
+                name += " \u25bc" if self.sort[1] else " \u25b2"
+            self.table.heading(f"c{number + 1}", text=name)
+
+    def sort_by(self, column):
+        descending = self.sort == (column, False)
+        self.sort = (column, descending)
+        self.show_sort_arrow()
+        self.refresh()
+
+    def show_result(self, result):
+        self.result = result
+        self.refresh()
+
+    def refresh(self):
+        if self.result is None:
+            return
+        mode = self.mode_choice.get()
+        if mode == TABLE_MODES[0]:
+            if self.sort is not None and self.sort[0] in TABLE_COLUMNS:
+                sort_rows(self.result, *self.sort)
+            else:
+                self.show_filtered_rows(self.result)
+        else:
+            summarise(self.result, mode)
+
+    def show_sorted(self, result, positions):
+        # Sorted rows of an older result, or arriving after a summary was chosen, are dropped
+        if result is not self.result or self.mode_choice.get() != TABLE_MODES[0]:
+            return
+        self.show_filtered_rows(Selection(result.dataset, positions))
+
+    def show_filtered_rows(self, rows):
+        # The columns of a summary still showing are only replaced once the rows arrive,
+        # until then the selection being rendered is still the summary
+        self.summary = None
+        self.set_columns(TABLE_COLUMNS, TABLE_COLUMN_WIDTHS)
+        self.show_rows(rows)
+
+    def show_summary(self, name, summary):
+        # A summary finishing after the mode was changed again is not shown
+        if name != self.mode_choice.get():
+            return
+        # Summaries have few rows and are simply sorted as they are
+        if self.sort is not None and self.sort[0] in summary.columns:
+            summary = summary.sort_values(self.sort[0], ascending=not self.sort[1], kind="stable", ignore_index=True)
+        self.summary = summary
+        # The grouped column is the widest, the statistics share the rest of the width
+        other_width = (sum(TABLE_COLUMN_WIDTHS) - 160) // max(1, len(summary.columns) - 1)
+        self.set_columns(tuple(summary.columns), (160,) + (other_width,) * (len(summary.columns) - 1))
+        self.show_rows(Selection(summary))
+
+    def show_count(self, row_count):
+        self.count_info.config(text=f"({row_count} rows)")
+
+    def page_size(self):
+        # Rows per page, or None when every row is on one scrolling page
+        size = self.page_size_choice.get()
+        if size == TABLE_PAGE_SIZES[0]:
+            return None
+        return int(size)
+
+    def page_count(self):
+        size = self.page_size()
+        if size is None:
+            return 1
+        return max(1, -(-len(self.rows) // size))
+
+    def show_rows(self, rows):
+        self.rows = rows
+        self.show_page(0)
+
+    def first_page(self):
+        self.show_page(0)
+
+    def previous_page(self):
+        self.show_page(self.page - 1)
+
+    def next_page(self):
+        self.show_page(self.page + 1)
+
+    def last_page(self):
+        self.show_page(self.page_count() - 1)
+
+    def show_page(self, page):
+        # Only the positions of the page are sliced out of the rows, and render() reads
+        # the values of the rows on screen, so a page change costs the same at any row count
+        with instrumentation.operation("table", page=page) as timing:
+            self.page = max(0, min(page, self.page_count() - 1))
+            size = self.page_size()
+            if size is None or len(self.rows) == 0:
+                self.selection = self.rows
+                self.page_info.config(text="")
+            else:
+                start = self.page * size
+                self.selection = self.rows.page(start, size)
+                self.page_info.config(text=f"Page {self.page + 1} of {self.page_count()}, rows {min(start + 1, len(self.rows))}-{start + len(self.selection)}")
+            self.offset = 0
+            self.window = []
+            self.window_start = 0
+            timing.stage("page", rows=len(self.selection))
+            # A single bulk delete, render() inserts the items it needs again
+            self.table.delete(*self.table.get_children())
+            timing.stage("clear")
+            self.render()
+            timing.stage("insert", rows=len(self.table.get_children()))
+            timing.set_rows(len(self.selection))
+
+    def visible_rows(self):
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or 20
+        # The heading takes up roughly one row at the top of the widget
+        return max(1, self.table.winfo_height() // int(row_height) - 1)
+
+    def mouse_wheel(self, event):
+        if event.delta > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
+
+    def scroll(self, action, amount, unit=None):
+        # Called by the scrollbar with ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.selection)))
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.visible_rows())
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def scroll_to(self, offset):
+        self.offset = max(0, min(offset, len(self.selection) - self.visible_rows()))
+        self.render()
+
+    def render(self):
+        visible = self.visible_rows()
+        count = max(0, min(visible, len(self.selection) - self.offset))
+
+        # Refill the materialized window once the visible rows move outside of it
+        window_end = self.window_start + len(self.window)
+        if self.offset < self.window_start or self.offset + count > window_end:
+            self.window_start = max(0, self.offset - TABLE_BUFFER_ROWS)
+            self.window = self.selection.rows(self.window_start, self.offset + visible + TABLE_BUFFER_ROWS, self.columns)
+
+        items = self.table.get_children()
+        if len(items) > count:
+            self.table.delete(*items[count:])
+        for i in range(count):
+            values = self.window[self.offset - self.window_start + i]
+            if i < len(items):
+                self.table.item(items[i], values=values)
+            else:
+                self.table.insert(parent="", index="end", values=values)
+
+        if len(self.selection) > 0:
+            self.scrollbar.set(self.offset / len(self.selection), (self.offset + count) / len(self.selection))
+        else:
+            self.scrollbar.set(0, 1)
+
+
+class GraphPage(tk.Frame):
+    # matplotlib is only imported when the first graph is drawn, it is slow to load.
+    # The figure and its two plots are created once, later graphs only replace
+    # their data and limits, which redraws much faster than clearing the axes
+    def __init__(self, parent):
+        super().__init__(master=parent, background=PLATINUM)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1, uniform="a")
+        self.grid_rowconfigure(1, weight=9, uniform="a")
+        self.grid_rowconfigure(2, weight=1, uniform="a")
+        self.figure = None
+        self.create_widgets()
+
+    def create_widgets(self):
+        controls = tk.Frame(self, background=PLATINUM)
+        controls.grid(row=0, column=0)
+        column_label = tk.Label(controls, text="Plot: ", font=FILTER_STYLE, background=PLATINUM)
+        column_label.pack(side="left")
+        self.column_choice = ttk.Combobox(controls, values=GRAPH_COLUMNS, state="readonly", width=8)
+        self.column_choice.set(GRAPH_COLUMNS[0])
+        self.column_choice.pack(side="left", padx=5)
+        self.kind_choice = ttk.Combobox(controls, values=GRAPH_KINDS, state="readonly", width=10)
+        self.kind_choice.set(GRAPH_KINDS[0])
+        self.kind_choice.pack(side="left", padx=5)
+        plot_button = tk.Button(controls, text="PLOT", font=("Bahnschrift", 12, "normal"), background=PLATINUM, command=plot_graph)
+        plot_button.pack(side="left", padx=10)
+        self.column_choice.bind("<<ComboboxSelected>>", lambda event: plot_graph())
+        self.kind_choice.bind("<<ComboboxSelected>>", lambda event: plot_graph())
+
+        self.plot_area = tk.Frame(self, background=PLATINUM)
+        self.plot_area.grid(row=1, column=0, sticky="nsew")
+
+        self.plot_info = tk.Label(self, text="Press PLOT to draw the filtered rows", font=("Bahnschrift", 12, "normal"),
+            background=PLATINUM)
+        self.plot_info.grid(row=2, column=0)
+
+    def create_figure(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self.figure = Figure(figsize=(7, 3.6), dpi=100, facecolor=PLATINUM)
+        self.figure.subplots_adjust(left=0.1, right=0.97, top=0.9, bottom=0.15)
+        self.axes = self.figure.add_subplot()
+        self.bars = self.axes.stairs([0], [0, 1], fill=True, color=SKY_BLUE)
+        self.points = self.axes.scatter([], [], s=6, color=SKY_BLUE)
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.plot_area)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def draw(self, plot):
+        from dataset_plots import AXIS_LABELS
+        kind, column, row_count, data = plot
+        if self.figure is None:
+            self.create_figure()
+        self.bars.set_visible(kind == "Histogram")
+        self.points.set_visible(kind == "Scatter")
+        if kind == "Scatter":
+            # data holds one (ID, value) row per point
+            self.points.set_offsets(data)
+            if len(data) > 0:
+                low, high = data.min(axis=0), data.max(axis=0)
+                margin = (high - low) * 0.05 + 1
+                self.axes.set_xlim(low[0] - margin[0], high[0] + margin[0])
+                self.axes.set_ylim(low[1] - margin[1], high[1] + margin[1])
+            self.axes.set_xlabel("ID number")
+            self.axes.set_ylabel(AXIS_LABELS[column])
+            shown = len(data)
+        else:
+            # data holds the bin edges and the number of athletes in each bin
+            edges, counts = data
+            self.bars.set_data(counts, edges)
+            self.axes.set_xlim(edges[0], edges[-1])
+            self.axes.set_ylim(0, max(counts.max(), 1) * 1.05)
+            self.axes.set_xlabel(AXIS_LABELS[column])
+            self.axes.set_ylabel("Frequency")
+            shown = row_count
+        self.axes.set_title(f"{column} distribution amongst athletes")
+        self.canvas.draw_idle()
+        if shown < row_count:
+            self.plot_info.config(text=f"{row_count} rows, a sample of {shown} of them plotted")
+        else:
+            self.plot_info.config(text=f"{row_count} rows plotted")
+
+
+class DiagnosticsPage(tk.Frame):
+    # The operations recorded by instrumentation.py, newest first, with the
+    # time, rows and memory change of each of their stages. The list is
+    # refreshed when the page is shown and whenever a background task ends
+    def __init__(self, parent):
+        super().__init__(master=parent, background=PLATINUM)
+        self.grid_columnconfigure(0, weight=1, uniform="a")
+        self.grid_rowconfigure(0, weight=1, uniform="a")
+        self.grid_rowconfigure(1, weight=8, uniform="a")
+        self.grid_rowconfigure(2, weight=1, uniform="a")
+        self.shown_sequence = None
+        self.create_widgets()
+
+    def create_widgets(self):
+        control_frame = tk.Frame(self, background=PLATINUM)
+        control_frame.grid(row=0, column=0)
+        self.recording = tk.BooleanVar(self, value=instrumentation.recording)
+        record_check = tk.Checkbutton(control_frame, text="Record timings", variable=self.recording,
+            font=("Bahnschrift", 12, "normal"), background=PLATINUM, command=self.toggle_recording)
+        record_check.pack(side="left", padx=10)
+        for text, command in (("PROFILE NEXT", self.profile_next), ("CLEAR", self.clear), ("REFRESH", self.refresh)):
+            tk.Button(control_frame, text=text, font=("Bahnschrift", 12, "normal"), background=PLATINUM,
+                command=command).pack(side="left", padx=5)
+
+        columns = ("Time", "Operation", "ms", "Rows", "Memory MB", "Stages")
+        self.table = ttk.Treeview(self, show="headings", columns=[f"c{number + 1}" for number in range(len(columns))])
+        for number, (name, width) in enumerate(zip(columns, (70, 90, 70, 70, 80, 300))):
+            self.table.heading(f"c{number + 1}", text=name)
+            self.table.column(f"c{number + 1}", stretch=(name == "Stages"), width=width)
+        self.table.grid(row=1, column=0, sticky="nsew", padx=10)
+
+        self.profile_info = tk.Label(self, text="", font=("Bahnschrift", 10, "normal"), background=PLATINUM)
+        self.profile_info.grid(row=2, column=0)
+
+    def toggle_recording(self):
+        if self.recording.get():
+            instrumentation.enable(TIMING_LOG)
+        else:
+            instrumentation.disable()
 
-        save_button = tk.Button(self, text="SAVE", font=("Bahnschrift", 12, "normal"), background=PLATINUM, command=save_file)
-        save_button.grid(row=2, column=1, sticky="nsew")
+    def profile_next(self):
+        instrumentation.profile_next()
+        self.profile_info.config(text="The next operation will be run under cProfile")
 
-        update_button = tk.Button(self, text="UPDATE", font=("Bahnschrift", 12, "normal"), background=PLATINUM, command=update)
-        update_button.grid(row=2, column=0, sticky="nsew")
+    def clear(self):
+        instrumentation.clear()
+        self.refresh()
 
-        self.table = ttk.Treeview(self, columns=("c1", "c2", "c3", "c4", "c5"), show="headings")
-        self.table.heading("c1", text="Sex")
-        self.table.column("c1", stretch=False, width=110)
-        self.table.heading("c2", text="Age")
-        self.table.column("c2", stretch=False, width=110)
-        self.table.heading("c3", text="Team")
-        self.table.column("c3", stretch=False, width=160)
-        self.table.heading("c4", text="Year")
-        self.table.column("c4", stretch=False, width=160)
-        self.table.heading("c5", text="Sport")
-        self.table.column("c5", stretch=False, width=160)
-        self.table.grid(row=1, column=0, columnspan=2, sticky="nsew")
+    def refresh(self):
+        if instrumentation.last_profile is not None:
+            self.profile_info.config(text=f"Last profile: {instrumentation.last_profile}")
+        if instrumentation.sequence == self.shown_sequence and len(self.table.get_children()) == len(instrumentation.records):
+            return
+        self.shown_sequence = instrumentation.sequence
+        self.table.delete(*self.table.get_children())
+        for record in reversed(instrumentation.recent()):
+            stages = ", ".join(f"{stage['stage']} {stage['ms']:.1f}" + ("" if stage["rows"] is None else f" ({stage['rows']})")
+                for stage in record["stages"])
+            rows = "" if record["rows"] is None else record["rows"]
+            operation = record["operation"]
+            if "error" in record:
+                operation += " (cancelled)" if record["error"] == "TaskCancelled" else " (failed)"
+            self.table.insert(parent="", index="end",
+                values=(record["time"][11:], operation, f"{record['ms']:.1f}", rows, f"{record['memory_mb']:+.1f}", stages))
 
 
 # MAIN APPLICATION #
 
-app = Application()
-app.mainloop()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filter, view and save the Olympic athletes dataset.")
+    parser.add_argument("paths", nargs="*", help="CSV files or glob patterns to load instead of the shortened dataset")
+    parser.add_argument("--log", help="record the timing of every operation, appending it to this JSON Lines file")
+    parser.add_argument("--profile", action="store_true", help="run loading the dataset under cProfile")
+    options = parser.parse_args()
+    if len(options.paths) > 0:
+        DATASET_PATHS = options.paths
+    if options.log is not None:
+        TIMING_LOG = options.log
+        instrumentation.enable(TIMING_LOG)
+    if options.profile:
+        instrumentation.profile_next()
+    app = Application()
+    app.mainloop()
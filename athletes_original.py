@@ -1,6 +1,5 @@
 import sys 
-import pandas as pd 
-import matplotlib.pyplot as plt
+from query_engine import QueryEngine, Query, Equals
 
 def numberCheck(number): # Checking that the input number is 0 < integer <= 5
     if len(number) > 5: # check that the user hasn't inputted more than 5 options 
@@ -20,18 +19,12 @@ def numberCheck(number): # Checking that the input number is 0 < integer <= 5
         print("Error: The input must be an integer number. Exiting program.")
         sys.exit()
 
-# function to filter out the dataset in each 'if' condition
-# so the dataset is continuously filtered, rather than all the filters being applied at once
-def sub_filter(df,filter,option): 
-    sub_df = df[(df[filter]==option)]
-    return sub_df
+# main filtering function to take inputs of which filters to apply to the dataset
+# each 'if' condition adds a condition to the query, which the query engine evaluates
+# once all the filters have been chosen, the original data is left untouched
+def filter(engine):
 
-# main filtering function to take inputs of which filters to apply to the dataframe
-def filter(df):
-
-    sub_df = pd.DataFrame() # creating empty dataframe to assign filtered data to
-    # making a copy of the dataframe to be filtered, so that the original data is untouched and can be returned if there are any erros with the chosen filter
-    sub_df = df 
+    query = Query() # an empty query matches every row
 
     print("Please enter the numbers of the filters you would like to use")
     print("(e.g. 234 if you want to filter by age, team and year):")
@@ -44,7 +37,7 @@ def filter(df):
             print("Error: Invalid argument")
             sys.exit()
 
-        sub_df = sub_filter(sub_df,"Sex",sex) # filtering the second dataframe by sex 
+        query = query.where(Equals("Sex",sex)) # filtering by sex
 
     if '2' in filterChoice: # Filter by Age 
         age = input("Enter age in years:")
@@ -56,7 +49,7 @@ def filter(df):
         except(ValueError):
             print("Error: The input must be exact years and not contain characters")
             sys.exit()
-        sub_df = sub_filter(sub_df,"Age",age)
+        query = query.where(Equals("Age",age))
 
     if '3' in filterChoice: # Filter by Team 
         team = input("Enter the name of the team:")
@@ -64,7 +57,7 @@ def filter(df):
         if valid == True: # input includes a digit
             print("Error: Input must not include a number")
             sys.exit()
-        sub_df = sub_filter(sub_df,"Team",team)
+        query = query.where(Equals("Team",team))
 
     if '4' in filterChoice: # Filter by Year 
         year = input("Enter the year:")
@@ -80,7 +73,7 @@ def filter(df):
             except(ValueError):
                 print("Error: Input is not an integer")
                 sys.exit()
-        sub_df = sub_filter(sub_df,"Year",year)  
+        query = query.where(Equals("Year",year))  
 
     if '5' in filterChoice: # Filter by Sport 
         sport = input("Enter the name of sport:")
@@ -88,19 +81,21 @@ def filter(df):
         if valid == True:
             print("Error: Input must not include a number")
             sys.exit()
-        sub_df = sub_filter(sub_df,"Sport",sport)
+        query = query.where(Equals("Sport",sport))
 
 
-    if (sub_df.empty) == True:
+    result = engine.run(query)
+    if result.count() == 0:
         print("Error: No entries match the chosen filter(s)")
         records = 0
-        return df,records  
+        return engine.dataset,records  
     else: 
-    # if there wasn't an error in filtering the dataframe
-    # then the new fully filtered dataframe can be returned with the number of records in that dataframe 
-        return sub_df,sub_df.shape[0]
+    # if there wasn't an error in filtering the dataset
+    # then the matching rows are copied into a new dataframe and returned with the number of records in it
+        return result.frame(),result.count()
 
 def plot(df,noRecords):
+    import matplotlib.pyplot as plt # only imported once there is something to plot, it is slow to load
     print("Plotting data...")
     if 0 < noRecords < 100: # creating a scatter graph
         plt.scatter(df['ID'],df['Weight'])
@@ -129,8 +124,9 @@ def plot(df,noRecords):
 
 def main():
     print("Loading dataset...")
-    df = pd.read_csv("athlete_events_shortened.csv")
-    sub_df,records = filter(df)
+    engine = QueryEngine.from_csv("athlete_events_shortened.csv")
+    df = engine.dataset
+    sub_df,records = filter(engine)
     if records == 0:
         print("There were 0 records that matched the chosen filters")
         print("Displaying original data...")
@@ -0,0 +1,135 @@
+# File: background.py
+# Description:
+# Runs slow operations (filtering, saving) on worker threads so the Tk event
+# loop never blocks. Tkinter widgets may only be touched from the main thread,
+# so workers never call back into the GUI directly: they put messages on a
+# queue, and the runner polls that queue with after() and dispatches the
+# callbacks on the Tk thread.
+#
+# Tasks are submitted under a kind, e.g. "filter". Submitting a new task of a
+# kind that is still running cancels the old one, and any result it still
+# produces is thrown away, so only the newest request is ever applied.
+
+import queue
+import threading
+
+# CONSTANTS #
+POLL_INTERVAL_MS = 50
+
+
+# CLASSES #
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, kind, function, cancellable=True):
+        self.kind = kind
+        self.function = function
+        self.cancellable = cancellable
+        self.cancel_event = threading.Event()
+        self.messages = None
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check(self):
+        # Called by the work function between steps, cancellation is cooperative
+        if self.cancelled():
+            raise TaskCancelled()
+
+    def report(self, fraction, text=""):
+        self.check()
+        self.messages.put(("progress", self, (fraction, text)))
+
+    def run(self):
+        try:
+            result = self.function(self)
+        except TaskCancelled:
+            self.messages.put(("cancelled", self, None))
+        except Exception as error:
+            self.messages.put(("error", self, error))
+        else:
+            self.messages.put(("done", self, result))
+
+
+class TaskRunner:
+    # on_start(task), on_progress(task, fraction, text) and on_finish(task) are
+    # optional hooks for a progress display, all called on the Tk thread
+    def __init__(self, root, on_start=None, on_progress=None, on_finish=None):
+        self.root = root
+        self.on_start = on_start
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.messages = queue.Queue()
+        self.running = {}
+        self.callbacks = {}
+        self.polling = False
+
+    def submit(self, kind, function, on_done, on_error=None, cancellable=True):
+        # function(task) runs on a worker thread, on_done(result) and
+        # on_error(exception) run on the Tk thread once it has finished.
+        # Tasks that are not cancellable are left alone by cancel()
+        if kind in self.running:
+            self.running[kind].cancel()
+        task = Task(kind, function, cancellable)
+        task.messages = self.messages
+        self.running[kind] = task
+        self.callbacks[task] = (on_done, on_error)
+        threading.Thread(target=task.run, daemon=True).start()
+        if self.on_start is not None:
+            self.on_start(task)
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_INTERVAL_MS, self.poll)
+        return task
+
+    def busy(self, kind=None):
+        if kind is None:
+            return len(self.running) > 0
+        return kind in self.running
+
+    def cancel(self, kind=None):
+        for task in list(self.running.values()):
+            if task.cancellable and (kind is None or task.kind == kind):
+                task.cancel()
+
+    def poll(self):
+        try:
+            while True:
+                try:
+                    message, task, value = self.messages.get_nowait()
+                except queue.Empty:
+                    break
+                self.dispatch(message, task, value)
+        finally:
+            # A callback that raises must not stop the polling, or every later result would be lost
+            if len(self.callbacks) > 0:
+                self.root.after(POLL_INTERVAL_MS, self.poll)
+            else:
+                self.polling = False
+
+    def dispatch(self, message, task, value):
+        # Messages from superseded or cancelled tasks are dropped
+        current = self.running.get(task.kind) is task and not task.cancelled()
+        if message == "progress":
+            if current and self.on_progress is not None:
+                self.on_progress(task, *value)
+            return
+
+        on_done, on_error = self.callbacks.pop(task)
+        if self.running.get(task.kind) is task:
+            del self.running[task.kind]
+        if self.on_finish is not None:
+            self.on_finish(task)
+        if not current:
+            return
+        if message == "done":
+            on_done(value)
+        elif message == "error":
+            if on_error is None:
+                raise value
+            on_error(value)
@@ -0,0 +1,164 @@
+# File: batch_query.py
+# Description:
+# Batch mode for the query engine: evaluates many queries in one go, for
+# reports over every (Team, Year) or (Sport, Sex) combination. Queries that
+# only test columns for equality are grouped by the columns they test, and
+# each group is answered by a single groupby pass over the dataset instead of
+# one index lookup and intersection per query. Any other query (ranges,
+# IN-lists, case-insensitive matching) is handed to the engine one by one.
+#
+# Command line use, writing one row per combination with its row count:
+#     python batch_query.py Team Year
+#     python batch_query.py Sport Sex --csv athlete_events.csv --output counts.csv
+#     python batch_query.py --queries queries.jsonl
+#     python batch_query.py Team Year --workers 4 --partition Year
+# where each line of queries.jsonl is a JSON object of column: value pairs.
+# With --workers the counting is spread over a process pool (see
+# parallel_query.py) instead of running in this process.
+
+import argparse
+import itertools
+import json
+import sys
+
+import pandas as pd
+
+from dataset_cache import load_dataset
+from dataset_index import EMPTY_POSITIONS
+from parallel_query import ParallelEngine, PARTITIONS
+from query_engine import QueryEngine, Query, Equals
+
+# CONSTANTS #
+DEFAULT_CSV = "athlete_events_shortened.csv"
+# Below this many queries on the same columns, index lookups beat a full groupby pass
+MIN_GROUPED_QUERIES = 32
+
+
+# FUNCTIONS #
+def equality_columns(query):
+    # The columns tested by a query made only of case-sensitive Equals conditions
+    # on different columns, or None if it has anything else
+    if len(query) == 0:
+        return None
+    columns = []
+    for condition in query.conditions:
+        if not isinstance(condition, Equals) or condition.ignore_case or condition.column in columns:
+            return None
+        columns.append(condition.column)
+    return tuple(sorted(columns))
+
+
+def group_key(query, columns):
+    values = {condition.column: condition.value for condition in query.conditions}
+    if len(columns) == 1:
+        return values[columns[0]]
+    return tuple(values[column] for column in columns)
+
+
+def grouped_rows(dataset, columns, rows):
+    # One pass over the dataset: combination of values -> row positions or row count
+    grouped = dataset.groupby(list(columns), observed=True, sort=False)
+    if rows:
+        return grouped.indices
+    return grouped.size().to_dict()
+
+
+def run_batch(engine, queries, rows=False):
+    # Row counts for each query, in order, or arrays of row positions with rows=True
+    results = [None] * len(queries)
+    groups = {}
+    for number, query in enumerate(queries):
+        columns = equality_columns(query)
+        if columns is not None:
+            groups.setdefault(columns, []).append(number)
+
+    for columns, numbers in groups.items():
+        if len(numbers) < MIN_GROUPED_QUERIES:
+            continue
+        answers = grouped_rows(engine.dataset, columns, rows)
+        missing = EMPTY_POSITIONS if rows else 0
+        for number in numbers:
+            results[number] = answers.get(group_key(queries[number], columns), missing)
+
+    for number, query in enumerate(queries):
+        if results[number] is None:
+            if rows:
+                results[number] = engine.run(query).positions
+            else:
+                results[number] = engine.count(query)
+    return results
+
+
+def distinct_values(dataset, column):
+    return sorted(dataset[column].dropna().unique().tolist())
+
+
+def cartesian_queries(engine, columns):
+    # One equality query for every combination of the distinct values of columns
+    values = [distinct_values(engine.dataset, column) for column in columns]
+    return [Query(*(Equals(column, value) for column, value in zip(columns, combination)))
+        for combination in itertools.product(*values)]
+
+
+def cartesian_counts(engine, columns, include_empty=False):
+    # Row count of every combination of values of columns as a DataFrame, in one groupby pass.
+    # Combinations that never occur are only listed with include_empty
+    counts = engine.dataset.groupby(list(columns), observed=True).size()
+    if include_empty:
+        everything = pd.MultiIndex.from_product([distinct_values(engine.dataset, column) for column in columns], names=columns)
+        counts = counts.reindex(everything, fill_value=0)
+    return counts.rename("Count").reset_index()
+
+
+def read_queries(path):
+    with open(path) as file:
+        return [Query(*(Equals(column, value) for column, value in json.loads(line).items()))
+            for line in file if line.strip() != ""]
+
+
+def single_process_table(options):
+    engine = QueryEngine.from_csv(options.csv)
+    if options.queries is not None:
+        queries = read_queries(options.queries)
+        counts = run_batch(engine, queries)
+        return pd.DataFrame({"Query": [query.describe() for query in queries], "Count": counts})
+    return cartesian_counts(engine, options.columns, options.include_empty)
+
+
+def parallel_table(options):
+    # The same table counted by a pool of options.workers processes
+    with ParallelEngine(load_dataset(options.csv), options.workers or None, options.partition, options.columns) as engine:
+        if options.queries is not None:
+            queries = read_queries(options.queries)
+            return pd.DataFrame({"Query": [query.describe() for query in queries], "Count": engine.counts(queries)})
+        return engine.group_counts(Query(), options.columns, options.include_empty)
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Count the athletes matching many filter combinations at once.")
+    parser.add_argument("columns", nargs="*", help="columns whose every combination of values is counted, e.g. Team Year")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="dataset to read")
+    parser.add_argument("--queries", help="JSON Lines file with one {column: value, ...} query per line")
+    parser.add_argument("--include-empty", action="store_true", help="also list combinations without any rows")
+    parser.add_argument("--output", help="CSV file to write instead of printing")
+    parser.add_argument("--workers", type=int, help="count in this many processes, one per core with 0")
+    parser.add_argument("--partition", choices=PARTITIONS, default=PARTITIONS[0],
+        help="split the dataset for the workers into ranges of rows or by Year")
+    options = parser.parse_args(arguments)
+    if len(options.columns) == 0 and options.queries is None:
+        parser.error("give the columns to combine or --queries")
+
+    if options.workers is None:
+        table = single_process_table(options)
+    else:
+        table = parallel_table(options)
+
+    if options.output is None:
+        table.to_csv(sys.stdout, index=False)
+    else:
+        table.to_csv(options.output, index=False)
+        print(f"{len(table)} rows written to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
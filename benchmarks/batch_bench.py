@@ -0,0 +1,55 @@
+# File: benchmarks/batch_bench.py
+# Description:
+# Compares batch_query.run_batch() with answering the same report one query
+# at a time, for every (Team, Year) and every (Sport, Sex) combination. The
+# single queries go through a fresh QueryEngine each run so they pay for
+# their own index lookups. The original mask chain is far too slow for
+# thousands of queries, so it is timed on a sample and scaled up.
+
+import time
+
+from batch_query import run_batch, cartesian_queries
+from benchmarks.common import best_time, dataset_path, print_row
+from query_engine import QueryEngine
+
+# CONSTANTS #
+REPORTS = (("Team", "Year"), ("Sport", "Sex"))
+MASK_CHAIN_SAMPLE = 50
+
+
+# FUNCTIONS #
+def mask_chain_count(dataset, query):
+    filtered = dataset
+    for condition in query.conditions:
+        filtered = filtered[filtered[condition.column] == condition.value]
+    return len(filtered)
+
+
+def mask_chain_ms(dataset, queries):
+    # Time per query over an evenly spread sample, scaled to every query
+    sample = queries[::max(len(queries) // MASK_CHAIN_SAMPLE, 1)]
+    start = time.perf_counter()
+    for query in sample:
+        mask_chain_count(dataset, query)
+    return (time.perf_counter() - start) * 1000 / len(sample) * len(queries)
+
+
+def single_counts(dataset, queries):
+    engine = QueryEngine(dataset)
+    return [engine.count(query) for query in queries]
+
+
+def main():
+    engine = QueryEngine.from_csv(dataset_path())
+    print_row("report", "mask chain (est.)", "single queries", "batch")
+    for columns in REPORTS:
+        queries = cartesian_queries(engine, columns)
+        single_ms = best_time(lambda: single_counts(engine.dataset, queries), repeat=3)
+        batch_ms = best_time(lambda: run_batch(engine, queries), repeat=3)
+        print_row(f"{' x '.join(columns)} ({len(queries)} queries)", f"{mask_chain_ms(engine.dataset, queries):.0f} ms",
+            f"{single_ms:.1f} ms", f"{batch_ms:.1f} ms")
+        assert run_batch(engine, queries) == single_counts(engine.dataset, queries)
+
+
+if __name__ == "__main__":
+    main()
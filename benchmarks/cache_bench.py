@@ -0,0 +1,51 @@
+# File: benchmarks/cache_bench.py
+# Description:
+# Replays an analyst session against query_cache.QueryCache: a handful of
+# Team/Year/Sport combinations cycled through repeatedly, plus queries that
+# add one more filter to a combination seen before. The same session is also
+# answered by the index alone for comparison, and the cache counters are
+# printed at the end.
+
+import itertools
+
+from benchmarks.common import best_time, dataset_path, print_row
+from dataset_cache import load_dataset
+from dataset_index import DatasetIndex
+from query_cache import QueryCache
+from query_engine import Query, Equals
+
+# CONSTANTS #
+SESSION_REPEATS = 20
+
+
+# FUNCTIONS #
+def uncached(index, key):
+    return index.query([(condition.column, condition.value) for condition in key])
+
+
+def main():
+    dataset = load_dataset(dataset_path())
+    index = DatasetIndex(dataset)
+    teams = dataset["Team"].value_counts().index[:3]
+    years = dataset["Year"].value_counts().index[:2]
+    sports = dataset["Sport"].value_counts().index[:2]
+    combinations = [Query(Equals("Team", team), Equals("Year", year)) for team, year in itertools.product(teams, years)]
+    narrower = [query.where(Equals("Sport", sport)) for query in combinations for sport in sports]
+    narrower += [query.where(Equals("Sex", "M")) for query in combinations]
+    session = [query.key() for query in (combinations * SESSION_REPEATS) + narrower]
+
+    cache = QueryCache()
+    print(f"{len(session)} queries")
+    print_row("session", "index only", "with cache")
+    index_ms = best_time(lambda: [uncached(index, key) for key in session], repeat=3)
+    # A single run on an empty cache, so it pays for its own misses
+    cached_ms = best_time(lambda: [cache.query(index, key) for key in session], repeat=1)
+    print_row("whole session", f"{index_ms:.2f} ms", f"{cached_ms:.2f} ms")
+    print_row("repeat of the session", "", f"{best_time(lambda: [cache.query(index, key) for key in session]):.2f} ms")
+    for key in session:
+        assert len(cache.query(index, key)) == len(uncached(index, key))
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# File: benchmarks/common.py
+# Description:
+# Shared helpers for the benchmark scripts in this folder.
+# The scripts are run from the repository root as modules, for example
+#     python -m benchmarks.index_bench [path/to/athlete_events.csv]
+# and default to the shortened dataset used by the application.
+
+import sys
+import time
+import pandas as pd
+
+import instrumentation
+
+# CONSTANTS #
+DEFAULT_CSV = "athlete_events_shortened.csv"
+
+
+# FUNCTIONS #
+def dataset_path():
+    if len(sys.argv) > 1:
+        return sys.argv[1]
+    return DEFAULT_CSV
+
+
+def load_dataset():
+    return pd.read_csv(dataset_path())
+
+
+def best_time(function, repeat=5):
+    # Best of several runs in milliseconds, the minimum is the least noisy estimate
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = (time.perf_counter() - start) * 1000
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def print_row(name, *values):
+    print(f"{name:<40}" + "".join(f"{value:>18}" for value in values))
+
+
+def rss_mb():
+    # Resident memory of this process in MB, read as the timing records read it
+    return instrumentation.resident_memory() / 2**20
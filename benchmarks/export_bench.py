@@ -0,0 +1,43 @@
+# File: benchmarks/export_bench.py
+# Description:
+# Throughput of the streaming export in data_export.py, in rows per second,
+# for every file format with all columns and with only the five columns
+# shown in the table. The dataset is loaded the way the application loads it. Half of the rows are exported (every other row) so the
+# position-based chunking is exercised rather than plain slicing.
+# Parquet is skipped when pyarrow is not installed.
+
+import os
+import tempfile
+
+from benchmarks.common import best_time, dataset_path, print_row
+from data_export import export_rows
+from export_formats import EXPORT_FORMATS
+from dataset_cache import load_dataset
+
+# CONSTANTS #
+DISPLAYED_COLUMNS = ("Sex", "Age", "Team", "Year", "Sport")
+
+
+# FUNCTIONS #
+def main():
+    dataset = load_dataset(dataset_path())
+    positions = dataset.index.to_numpy()[::2]
+    print(f"{len(positions)} of {len(dataset)} rows")
+    print_row("format", "all columns", "shown columns", "file size")
+    with tempfile.TemporaryDirectory() as folder:
+        for export_format, extension in EXPORT_FORMATS.items():
+            path = os.path.join(folder, "export" + extension)
+            results = []
+            try:
+                for columns in (None, DISPLAYED_COLUMNS):
+                    elapsed = best_time(lambda: export_rows(dataset, positions, path, columns=columns), repeat=3)
+                    results.append(f"{len(positions) / elapsed * 1000:,.0f} rows/s")
+            except ImportError as error:
+                print_row(export_format, "skipped", str(error)[:30])
+                continue
+            results.append(f"{os.path.getsize(path) / 2**20:.1f} MB")
+            print_row(export_format, *results)
+
+
+if __name__ == "__main__":
+    main()
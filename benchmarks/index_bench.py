@@ -0,0 +1,63 @@
+# File: benchmarks/index_bench.py
+# Description:
+# Compares the original boolean-mask chain of filter_dataset() with the
+# position index from dataset_index.py for single and combined filters.
+# The queries use the most common value of each column so that every
+# step of the mask chain has rows left to scan.
+
+from benchmarks.common import load_dataset, best_time, print_row
+from dataset_index import DatasetIndex, INDEXED_COLUMNS
+
+
+# FUNCTIONS #
+def mask_chain(df, filters):
+    # Mirrors the old sub_filter() usage: one scan for the "matches anything"
+    # check and a second identical scan to apply the filter
+    filtered = df.copy()
+    for column, value in filters:
+        if filtered[(filtered[column] == value)].size > 0:
+            filtered = filtered[(filtered[column] == value)]
+    return filtered
+
+
+def index_positions(index, filters):
+    positions = None
+    for column, value in filters:
+        matches = index.refine(positions, column, value)
+        if len(matches) > 0:
+            positions = matches
+    return positions
+
+
+def index_query(df, index, filters):
+    positions = index_positions(index, filters)
+    if positions is None:
+        return df
+    return df.iloc[positions]
+
+
+def main():
+    df = load_dataset()
+    print(f"{len(df)} rows")
+    print_row("index build", f"{best_time(lambda: DatasetIndex(df), repeat=3):.2f} ms")
+    index = DatasetIndex(df)
+
+    common = {column: df[column].mode().iloc[0] for column in INDEXED_COLUMNS}
+    queries = [[(column, common[column])] for column in INDEXED_COLUMNS]
+    queries.append([("Sex", common["Sex"]), ("Year", common["Year"])])
+    queries.append([("Team", common["Team"]), ("Year", common["Year"]), ("Sport", common["Sport"])])
+    queries.append([(column, common[column]) for column in INDEXED_COLUMNS])
+
+    # "positions" is the lookup and intersection alone, "index" also slices the rows out of df
+    print_row("query", "mask chain", "positions", "index", "speed-up")
+    for filters in queries:
+        assert len(mask_chain(df, filters)) == len(index_query(df, index, filters))
+        mask_ms = best_time(lambda: mask_chain(df, filters))
+        positions_ms = best_time(lambda: index_positions(index, filters))
+        index_ms = best_time(lambda: index_query(df, index, filters))
+        name = " & ".join(f"{column}={value}" for column, value in filters)
+        print_row(name[:40], f"{mask_ms:.3f} ms", f"{positions_ms:.3f} ms", f"{index_ms:.3f} ms", f"{mask_ms / index_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
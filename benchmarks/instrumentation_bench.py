@@ -0,0 +1,62 @@
+# File: benchmarks/instrumentation_bench.py
+# Description:
+# The cost of the timing calls left in the GUI code: one operation with a
+# stage per filter around a two-filter query, as filtering on the Filter page
+# does, with recording off, with recording on, and with recording on and a
+# JSON log file. With recording off the calls should add well under a
+# microsecond per operation.
+
+import os
+import tempfile
+import time
+
+import instrumentation
+from benchmarks.common import dataset_path, print_row
+from query_engine import QueryEngine, Query, Equals
+
+# CONSTANTS #
+REPEATS = 20000
+
+
+# FUNCTIONS #
+def per_call_us(function, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 10**6
+
+
+def main():
+    engine = QueryEngine.from_csv(dataset_path())
+    first, second = Query(Equals("Sex", "F")), Query(Equals("Sex", "F"), Equals("Year", 2000))
+    # Warms the query cache, so every run times the same cached lookups
+    engine.positions(second)
+
+    def plain():
+        engine.positions(first)
+        engine.positions(second)
+
+    def timed():
+        with instrumentation.operation("filter") as timing:
+            timing.stage("Sex", rows=len(engine.positions(first)))
+            timing.stage("Year", rows=len(engine.positions(second)))
+            timing.set_rows(len(engine.positions(second)))
+
+    def empty():
+        with instrumentation.operation("filter") as timing:
+            timing.stage("Sex")
+            timing.set_rows(0)
+
+    print_row("filter with two stages", "per operation", "calls alone")
+    print_row("no timing calls", f"{per_call_us(plain):.2f} us", "")
+    print_row("recording off", f"{per_call_us(timed):.2f} us", f"{per_call_us(empty):.3f} us")
+    instrumentation.enable()
+    print_row("recording on", f"{per_call_us(timed):.2f} us", f"{per_call_us(empty):.3f} us")
+    with tempfile.TemporaryDirectory() as folder:
+        instrumentation.enable(os.path.join(folder, "timings.jsonl"))
+        print_row("recording on, JSON log", f"{per_call_us(timed):.2f} us", f"{per_call_us(empty):.3f} us")
+        instrumentation.disable()
+
+
+if __name__ == "__main__":
+    main()
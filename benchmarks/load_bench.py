@@ -0,0 +1,59 @@
+# File: benchmarks/load_bench.py
+# Description:
+# Start-up cost of loading the dataset: a plain read_csv, a cold load that
+# parses the CSV and writes the binary cache, and a warm load that memory-maps
+# the cache. Each load runs in a fresh interpreter so earlier imports and
+# allocations do not flatter the later measurements. The resident memory is
+# measured after the load and after touching every column once.
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from benchmarks.common import dataset_path, rss_mb, print_row
+
+# CONSTANTS #
+MODES = ("read_csv", "cold", "warm")
+
+
+# FUNCTIONS #
+def measure(mode, path):
+    # Runs inside the child interpreter started by main()
+    import pandas as pd
+    from dataset_cache import load_dataset
+    baseline = rss_mb()
+    start = time.perf_counter()
+    if mode == "read_csv":
+        dataset = pd.read_csv(path)
+    else:
+        dataset = load_dataset(path)
+    elapsed = (time.perf_counter() - start) * 1000
+    loaded = rss_mb() - baseline
+    for column in dataset.columns:
+        dataset[column].isna().sum()
+    touched = rss_mb() - baseline
+    print(json.dumps({"ms": elapsed, "rss_loaded": loaded, "rss_touched": touched, "rows": len(dataset)}))
+
+
+def main():
+    path = dataset_path()
+    from dataset_cache import cache_location
+    shutil.rmtree(cache_location(path), ignore_errors=True)
+
+    print_row("load", "time", "RSS after load", "RSS all columns")
+    for mode in MODES:
+        output = subprocess.run([sys.executable, "-m", "benchmarks.load_bench", path, mode],
+            check=True, capture_output=True, text=True, cwd=os.getcwd()).stdout
+        result = json.loads(output)
+        print_row(f"{mode} ({result['rows']} rows)", f"{result['ms']:.1f} ms",
+            f"{result['rss_loaded']:.1f} MB", f"{result['rss_touched']:.1f} MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        measure(sys.argv[2], sys.argv[1])
+    else:
+        main()
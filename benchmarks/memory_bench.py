@@ -0,0 +1,71 @@
+# File: benchmarks/memory_bench.py
+# Description:
+# Peak memory allocated per query, measured with tracemalloc, for the
+# original filter_dataset() path (a full DATASET.copy() followed by boolean
+# mask filtering into intermediate DataFrames) and for the current one (row
+# positions from the index, then only the rows on screen and one export
+# chunk of the shown columns materialized from the base dataset).
+
+import tracemalloc
+
+from benchmarks.common import dataset_path, print_row
+from dataset_cache import load_dataset
+from data_export import EXPORT_CHUNK_ROWS
+from query_engine import QueryEngine, Query, Equals
+
+# CONSTANTS #
+TABLE_COLUMNS = ("Sex", "Age", "Team", "Year", "Sport")
+FILTER_COLUMNS = TABLE_COLUMNS
+VISIBLE_ROWS = 25
+
+
+# FUNCTIONS #
+def before(dataset, filters):
+    filtered = dataset.copy()
+    for column, value in filters:
+        if filtered[(filtered[column] == value)].size > 0:
+            filtered = filtered[(filtered[column] == value)]
+    # The old table read every row of the result through iloc
+    return filtered.iloc[:VISIBLE_ROWS, 1:6]
+
+
+def after(engine, filters):
+    query = Query()
+    for column, value in filters:
+        if engine.count(query.where(Equals(column, value))) > 0:
+            query = query.where(Equals(column, value))
+    result = engine.run(query)
+    result.rows(0, VISIBLE_ROWS, TABLE_COLUMNS)
+    return result.frame(TABLE_COLUMNS, 0, EXPORT_CHUNK_ROWS)
+
+
+def peak_kb(function):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    dataset = load_dataset(dataset_path())
+    common = {column: dataset[column].mode().iloc[0] for column in FILTER_COLUMNS}
+    queries = [[("Team", common["Team"])], [("Sex", common["Sex"])],
+        [("Sex", common["Sex"]), ("Year", common["Year"])],
+        [(column, common[column]) for column in FILTER_COLUMNS]]
+
+    print(f"{len(dataset)} rows, dataset itself {dataset.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+    print_row("query", "before", "after", "after, cached")
+    for filters in queries:
+        # A new engine per query so the first run starts with an empty cache
+        engine = QueryEngine(dataset)
+        before_kb = peak_kb(lambda: before(dataset, filters))
+        after_kb = peak_kb(lambda: after(engine, filters))
+        cached_kb = peak_kb(lambda: after(engine, filters))
+        name = " & ".join(f"{column}={value}" for column, value in filters)
+        print_row(name[:40], f"{before_kb:,.0f} KB", f"{after_kb:,.0f} KB", f"{cached_kb:,.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
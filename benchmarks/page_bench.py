@@ -0,0 +1,52 @@
+# File: benchmarks/page_bench.py
+# Description:
+# Times a page change on the Table page: the rows of one page taken by
+# offset and limit from the positions of a filter result, at the first, middle
+# and last page, for results from a few hundred rows up to the whole dataset.
+# The peak memory of a page change is measured with tracemalloc, and should
+# depend on the page size only, not on how many rows match.
+
+import tracemalloc
+
+from benchmarks.common import best_time, dataset_path, print_row
+from query_engine import QueryEngine, Query, Equals
+
+# CONSTANTS #
+TABLE_COLUMNS = ("Sex", "Age", "Team", "Year", "Sport")
+PAGE_SIZE = 100
+
+
+# FUNCTIONS #
+def show_page(result, page):
+    return result.page(page * PAGE_SIZE, PAGE_SIZE).rows(0, PAGE_SIZE, TABLE_COLUMNS)
+
+
+def peak_kb(function):
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**10
+
+
+def main():
+    engine = QueryEngine.from_csv(dataset_path())
+    team = engine.dataset["Team"].value_counts().index[0]
+    queries = {
+        "whole dataset": Query(),
+        "Sex: F": Query(Equals("Sex", "F")),
+        f"Team: {team}": Query(Equals("Team", team)),
+    }
+
+    print(f"{PAGE_SIZE} rows per page")
+    print_row("result", "first page", "middle page", "last page", "peak memory")
+    for name, query in queries.items():
+        result = engine.run(query)
+        last = (len(result) - 1) // PAGE_SIZE
+        times = [best_time(lambda: show_page(result, page)) for page in (0, last // 2, last)]
+        memory = peak_kb(lambda: show_page(result, last // 2))
+        print_row(f"{name} ({len(result)} rows)", *(f"{ms:.2f} ms" for ms in times), f"{memory:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
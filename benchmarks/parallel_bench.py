@@ -0,0 +1,97 @@
+# File: benchmarks/parallel_bench.py
+# Description:
+# Times the ParallelEngine of parallel_query.py against the same work done in
+# this process: filtering the whole dataset without the index (as chunked
+# mode does), the QueryEngine index, and the Team x Year and Sport x Sex
+# reports of batch_query.py. Each is run with one worker and with one worker
+# per core, with the dataset split into ranges of rows and by Year, and the
+# number of partitions skipped for a query on a few Games is printed.
+#
+#     python -m benchmarks.parallel_bench              a synthetic dataset of 1m rows
+#     python -m benchmarks.parallel_bench 10m
+#     python -m benchmarks.parallel_bench athlete_events.csv
+#
+# Starting the pool and copying the columns to shared memory is timed on its
+# own, as a batch job pays for it once. On a machine with a single core the
+# pool can only show its overhead.
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from batch_query import cartesian_counts
+from benchmarks.common import best_time, print_row
+from benchmarks.synthetic import row_count, synthetic_csv
+from data_source import matching_rows
+from dataset_cache import load_dataset
+from parallel_query import ParallelEngine, PARTITIONS
+from query_engine import QueryEngine, Query, Equals, Between, Prefix
+
+# CONSTANTS #
+DEFAULT_SIZE = "1m"
+DATA_FOLDER = os.path.join(tempfile.gettempdir(), "athlete_synthetic")
+QUERIES = {
+    "two filters": Query(Equals("Sex", "F"), Equals("Sport", "Athletics")),
+    "Games 1992-2000": Query(Equals("Sex", "F"), Between("Year", 1992, 2000)),
+    "prefix and range": Query(Prefix("Team", "ger"), Between("Age", 20, 30)),
+}
+REPORTS = (("Team", "Year"), ("Sport", "Sex"))
+
+
+# FUNCTIONS #
+def data_path():
+    # A CSV file given on the command line, or a synthetic dataset of the size given
+    argument = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SIZE
+    if os.path.isfile(argument):
+        return argument
+    return synthetic_csv(DATA_FOLDER, row_count(argument))
+
+
+def scan_positions(dataset, query):
+    return np.flatnonzero(matching_rows(dataset, query.conditions))
+
+
+def start(dataset, workers, partition_by):
+    # Sharing the columns and starting the pool, which happens on the first query
+    with ParallelEngine(dataset, workers, partition_by, [column for columns in REPORTS for column in columns]) as parallel:
+        parallel.count(Query())
+
+
+def index_positions(engine, query):
+    engine.cache.clear()
+    return engine.positions(query)
+
+
+def main():
+    dataset = load_dataset(data_path())
+    engine = QueryEngine(dataset)
+    workers = os.cpu_count() or 1
+    print(f"{len(dataset)} rows, {workers} core(s)")
+    print_row("single process", "scan", "index")
+    for name, query in QUERIES.items():
+        print_row(name, f"{best_time(lambda: scan_positions(dataset, query), repeat=3):.1f} ms",
+            f"{best_time(lambda: index_positions(engine, query), repeat=3):.1f} ms")
+    for columns in REPORTS:
+        print_row(" x ".join(columns), f"{best_time(lambda: cartesian_counts(engine, columns), repeat=3):.1f} ms", "")
+
+    for partition_by in PARTITIONS:
+        for count in sorted({1, workers}):
+            print()
+            print_row(f"{count} worker(s), by {partition_by}", "time", "skipped")
+            print_row("start", f"{best_time(lambda: start(dataset, count, partition_by), repeat=1):.1f} ms", "")
+            group_columns = [column for columns in REPORTS for column in columns]
+            with ParallelEngine(dataset, count, partition_by, group_columns) as parallel:
+                for name, query in QUERIES.items():
+                    ms = best_time(lambda: parallel.positions(query), repeat=3)
+                    print_row(name, f"{ms:.1f} ms", f"{parallel.skipped} of {len(parallel.partitions)}")
+                    assert np.array_equal(parallel.positions(query), index_positions(engine, query))
+                for columns in REPORTS:
+                    ms = best_time(lambda: parallel.group_counts(Query(), columns), repeat=3)
+                    print_row(" x ".join(columns), f"{ms:.1f} ms", "")
+                    assert parallel.group_counts(Query(), columns)["Count"].sum() == len(dataset)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# File: benchmarks/plot_bench.py
+# Description:
+# Times a redraw of the Graph page on the whole dataset and on a filtered
+# subset: the original approach (copy the rows, plt.hist on the Weight column)
+# against the precomputed bins of dataset_plots.py drawn into a reused figure.
+# Uses the Agg backend, so no display is needed.
+
+from benchmarks.common import best_time, dataset_path, print_row
+from dataset_plots import DatasetPlots
+from query_engine import QueryEngine, Query, Equals
+
+# CONSTANTS #
+FIGURE_SIZE = (7, 3.6)
+REDRAW_TARGET_MS = 100
+
+
+# FUNCTIONS #
+def original_redraw(figure, dataset, positions, column):
+    figure.clear()
+    axes = figure.add_subplot()
+    axes.hist(dataset.iloc[positions][column], 12)
+    figure.canvas.draw()
+
+
+def binned_redraw(figure, bars, plots, positions, column):
+    edges, counts = plots.histogram(positions, column)
+    bars.set_data(counts, edges)
+    figure.axes[0].set_xlim(edges[0], edges[-1])
+    figure.axes[0].set_ylim(0, max(counts.max(), 1) * 1.05)
+    figure.canvas.draw()
+
+
+def main():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    engine = QueryEngine.from_csv(dataset_path())
+    plots = DatasetPlots(engine.dataset)
+    selections = {
+        "whole dataset": range(len(engine.dataset)),
+        "Sex: F": engine.positions(Query(Equals("Sex", "F"))),
+    }
+
+    original_figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(original_figure)
+    binned_figure = Figure(figsize=FIGURE_SIZE)
+    FigureCanvasAgg(binned_figure)
+    bars = binned_figure.add_subplot().stairs([0], [0, 1], fill=True)
+    print(f"target: {REDRAW_TARGET_MS} ms per redraw")
+    print_row("Weight histogram of", "original", "pre-binned")
+    for name, positions in selections.items():
+        original_ms = best_time(lambda: original_redraw(original_figure, engine.dataset, positions, "Weight"))
+        binned_ms = best_time(lambda: binned_redraw(binned_figure, bars, plots, positions, "Weight"))
+        print_row(name, f"{original_ms:.1f} ms", f"{binned_ms:.1f} ms")
+    print_row("scatter sample of the whole dataset", "", f"{best_time(lambda: plots.scatter(selections['whole dataset'], 'Weight')):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# File: benchmarks/prefix_bench.py
+# Description:
+# Times the pieces of live filtering on the Filter page: the suggestions for
+# every prefix of every Team and Sport name (target: under a millisecond),
+# and typing a team name one character at a time, where each query refines
+# the cached result of the one before instead of starting from the index.
+
+from benchmarks.common import best_time, dataset_path, print_row
+from query_engine import QueryEngine, Query, Equals, Prefix
+
+# CONSTANTS #
+SUGGESTION_TARGET_MS = 1
+MAX_SUGGESTIONS = 8
+TYPED_NAMES = 20
+
+
+# FUNCTIONS #
+def typing(engine, name, refine=True):
+    # One query per key press, with a filter on Sex entered first.
+    # Without refine every key press starts from the index again
+    for length in range(1, len(name) + 1):
+        if not refine:
+            engine.cache.clear()
+        engine.count(Query(Equals("Sex", "F"), Prefix("Team", name[:length])))
+
+
+def main():
+    engine = QueryEngine.from_csv(dataset_path())
+    print_row("suggestions", "prefixes", "slowest")
+    for column in ("Team", "Sport"):
+        names = engine.index.values(column)
+        prefixes = {str(name)[:length] for name in names for length in range(1, len(str(name)) + 1)}
+        # Builds the sorted table of the column, as the first key press in the GUI does
+        engine.index.values_with_prefix(column, "")
+        slowest = max(best_time(lambda: engine.index.values_with_prefix(column, prefix, MAX_SUGGESTIONS), repeat=3)
+            for prefix in prefixes)
+        print_row(column, len(prefixes), f"{slowest:.3f} ms")
+    print(f"target: {SUGGESTION_TARGET_MS} ms")
+
+    names = [str(name) for name in engine.index.values("Team")][:TYPED_NAMES]
+    key_presses = sum(len(name) for name in names)
+    print_row(f"typing {len(names)} team names", "from the index", "refined")
+    fresh_ms = best_time(lambda: [typing(engine, name, refine=False) for name in names], repeat=3)
+    # Cleared before every run, so each run refines its own earlier key presses only
+    refined_ms = best_time(lambda: engine.cache.clear() or [typing(engine, name) for name in names], repeat=3)
+    print_row("per key press", f"{fresh_ms / key_presses:.2f} ms", f"{refined_ms / key_presses:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
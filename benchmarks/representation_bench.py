@@ -0,0 +1,53 @@
+# File: benchmarks/representation_bench.py
+# Description:
+# Compares the DataFrame returned by pd.read_csv with the compact version
+# built by dataset_cache.compact_dataset: the memory taken by every column,
+# and the time of a single equality filter on each of the filter columns,
+# comparing strings row by row against comparing category codes (the value
+# is translated to its code once) and against the position index.
+
+from benchmarks.common import best_time, load_dataset, print_row
+from dataset_cache import compact_dataset
+from dataset_index import DatasetIndex
+
+# CONSTANTS #
+FILTER_COLUMNS = ("Sex", "Team", "Sport", "Year", "Age")
+
+
+# FUNCTIONS #
+def megabytes(frame):
+    return frame.memory_usage(index=False, deep=True) / 2**20
+
+
+def code_filter(compact, column, value):
+    series = compact[column]
+    if series.dtype != "category":
+        return (series == value).to_numpy(dtype=bool, na_value=False).nonzero()[0]
+    code = series.cat.categories.get_loc(value)
+    return (series.array.codes == code).nonzero()[0]
+
+
+def main():
+    original = load_dataset()
+    compact = compact_dataset(original)
+    index = DatasetIndex(compact)
+
+    print_row("column", "read_csv", "compact", "dtype")
+    before, after = megabytes(original), megabytes(compact)
+    for column in original.columns:
+        print_row(column, f"{before[column]:.2f} MB", f"{after[column]:.2f} MB", str(compact[column].dtype))
+    print_row("total", f"{before.sum():.2f} MB", f"{after.sum():.2f} MB")
+    print()
+
+    print_row("filter on the most common value", "string mask", "code compare", "index")
+    for column in FILTER_COLUMNS:
+        value = original[column].value_counts().index[0]
+        mask_ms = best_time(lambda: (original[column] == value).to_numpy(dtype=bool, na_value=False).nonzero()[0])
+        code_ms = best_time(lambda: code_filter(compact, column, value))
+        index_ms = best_time(lambda: index.positions(column, value))
+        assert len(code_filter(compact, column, value)) == len(index.positions(column, value))
+        print_row(f"{column} == {value}", f"{mask_ms:.3f} ms", f"{code_ms:.3f} ms", f"{index_ms:.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
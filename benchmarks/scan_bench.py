@@ -0,0 +1,71 @@
+# File: benchmarks/scan_bench.py
+# Description:
+# Splits the dataset into a few CSV files, one per range of rows as if newer
+# Games were added as files of their own, and answers the same queries from
+# them with a DataSource in memory mode (load every file, then use the index)
+# and in chunked mode, both reading the CSVs with read_csv(chunksize=...) and
+# reading the memory-mapped caches. Time and peak traced memory are printed
+# for each; chunked mode should keep the peak at a few chunks' worth.
+
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.common import dataset_path, print_row
+from data_source import DataSource
+from dataset_cache import CACHE_DIRECTORY
+from query_engine import Query, Equals, Prefix, Between
+
+# CONSTANTS #
+FILE_COUNT = 4
+QUERIES = (
+    Query(Equals("Sex", "F"), Equals("Year", 2000)),
+    Query(Prefix("Team", "Team1"), Between("Age", 20, 25)),
+)
+
+
+# FUNCTIONS #
+def measure(function):
+    # (milliseconds, peak traced MB) of one run
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def answer(paths, mode):
+    source = DataSource(paths, mode)
+    return [source.count(query) for query in QUERIES]
+
+
+def main():
+    dataset = pd.read_csv(dataset_path())
+    with tempfile.TemporaryDirectory() as folder:
+        part_rows = -(-len(dataset) // FILE_COUNT)
+        for number in range(FILE_COUNT):
+            dataset.iloc[number * part_rows:(number + 1) * part_rows].to_csv(os.path.join(folder, f"part{number}.csv"), index=False)
+        paths = [os.path.join(folder, "*.csv")]
+        print(f"{len(dataset)} rows in {FILE_COUNT} files, {len(QUERIES)} queries")
+        print_row("mode", "time", "peak memory")
+
+        csv_ms, csv_mb = measure(lambda: answer(paths, "chunked"))
+        # The first load writes the binary caches the later runs read
+        first_ms, first_mb = measure(lambda: answer(paths, "memory"))
+        memory_ms, memory_mb = measure(lambda: answer(paths, "memory"))
+        cached_ms, cached_mb = measure(lambda: answer(paths, "chunked"))
+        assert answer(paths, "memory") == answer(paths, "chunked")
+        print_row("chunked, from the CSVs", f"{csv_ms:.0f} ms", f"{csv_mb:.1f} MB")
+        print_row("memory, first load", f"{first_ms:.0f} ms", f"{first_mb:.1f} MB")
+        print_row("memory, from the caches", f"{memory_ms:.0f} ms", f"{memory_mb:.1f} MB")
+        print_row("chunked, from the caches", f"{cached_ms:.0f} ms", f"{cached_mb:.1f} MB")
+        assert os.path.isdir(os.path.join(folder, CACHE_DIRECTORY))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# File: benchmarks/sort_bench.py
+# Description:
+# Times a click on a Table page heading for selections of 10k rows, 100k rows
+# and the whole dataset: sorting the selected rows with pandas sort_values,
+# which compares the values again on every click, against the permutations
+# DatasetIndex.sort_order builds once per column. The one-off cost of
+# building each permutation is printed separately.
+
+import time
+
+import numpy as np
+
+from benchmarks.common import best_time, dataset_path, print_row
+from query_engine import QueryEngine
+
+# CONSTANTS #
+SORT_COLUMNS = ("Team", "Age", "Sport")
+SELECTION_SIZES = (10000, 100000)
+
+
+# FUNCTIONS #
+def main():
+    engine = QueryEngine.from_csv(dataset_path())
+    dataset, index = engine.dataset, engine.index
+    generator = np.random.default_rng(0)
+    selections = {f"{size // 1000}k rows": np.sort(generator.choice(len(dataset), size, replace=False))
+        for size in SELECTION_SIZES if size < len(dataset)}
+    selections[f"all {len(dataset)} rows"] = None
+
+    print_row("permutation built once", "time")
+    for column in SORT_COLUMNS:
+        start = time.perf_counter()
+        index.sort_order(column)
+        print_row(column, f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    print()
+
+    print_row("sort click", "sort_values", "permutation", "descending")
+    for column in SORT_COLUMNS:
+        for name, positions in selections.items():
+            rows = dataset if positions is None else dataset.iloc[positions]
+            pandas_ms = best_time(lambda: rows.sort_values(column, kind="stable"), repeat=3)
+            ascending_ms = best_time(lambda: index.sorted_positions(positions, column))
+            descending_ms = best_time(lambda: index.sorted_positions(positions, column, descending=True))
+            print_row(f"{column}, {name}", f"{pandas_ms:.2f} ms", f"{ascending_ms:.2f} ms", f"{descending_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# File: benchmarks/startup_bench.py
+# Description:
+# Times how long the application takes to show its first frame, and how much
+# longer until the dataset has loaded and the Filter and Table pages are usable.
+# The application runs in a fresh interpreter, so the time includes starting
+# Python and every import, exactly as a user launching the program sees it.
+# It needs a display; on a headless machine run it under xvfb-run.
+#
+#     python -m benchmarks.startup_bench [path/to/athlete_events.csv]
+#
+# The exit status is 1 when the first frame misses FIRST_FRAME_TARGET_MS.
+
+import subprocess
+import sys
+import time
+
+# CONSTANTS #
+FIRST_FRAME_TARGET_MS = 500
+DATA_READY_TIMEOUT_S = 120
+
+
+# FUNCTIONS #
+def child(path):
+    # Runs inside the interpreter started by main(), reports each milestone on stdout
+    import athlete_dataset
+    athlete_dataset.DATASET_PATHS = [path]
+    app = athlete_dataset.Application()
+    athlete_dataset.app = app
+    app.update()
+    print("frame", flush=True)
+    deadline = time.monotonic() + DATA_READY_TIMEOUT_S
+    while athlete_dataset.ENGINE is None and time.monotonic() < deadline:
+        app.update()
+        time.sleep(0.005)
+    print("data", flush=True)
+    app.destroy()
+
+
+def main():
+    # benchmarks.common imports pandas, which the child must not pay for before its first frame
+    from benchmarks.common import dataset_path, print_row
+    path = dataset_path()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.startup_bench", path, "child"],
+        stdout=subprocess.PIPE, text=True)
+    milestones = {}
+    for line in process.stdout:
+        milestones[line.strip()] = (time.perf_counter() - start) * 1000
+    if process.wait() != 0 or "frame" not in milestones:
+        print("The application did not start, is a display available?")
+        sys.exit(2)
+
+    print_row("first frame", f"{milestones['frame']:.0f} ms", f"target {FIRST_FRAME_TARGET_MS} ms")
+    print_row("data ready", f"{milestones['data']:.0f} ms")
+    if milestones["frame"] > FIRST_FRAME_TARGET_MS:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2:
+        child(sys.argv[1])
+    else:
+        main()
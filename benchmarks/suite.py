@@ -0,0 +1,295 @@
+# File: benchmarks/suite.py
+# Description:
+# The benchmark suite: for synthetic datasets of several sizes (see
+# synthetic.py) it times loading the CSV cold and from the binary cache,
+# building the column index, every kind of filter, queries with several
+# filters, filling the Table page through the same path as update(), and
+# exporting a result. Everything is written to a JSON file and compared with
+# a stored baseline, and the exit status is 1 when anything got slower than
+# the baseline by more than the tolerance.
+#
+#     python -m benchmarks.suite                          10k, 100k and 1m rows
+#     python -m benchmarks.suite --sizes 10k 100k 1m 10m
+#     python -m benchmarks.suite --save-baseline          stores this run as the baseline
+#
+# The Table page runs on a headless stand-in for the Treeview and the other
+# widgets it uses, so the suite needs no display. What is timed is the real
+# TablePage code: the filter label, the page of rows, the bulk delete and the
+# inserts of the visible rows. The synthetic files are kept in a folder of
+# the system's temporary directory and reused by later runs.
+#
+# Baselines only mean something on the machine they were made on, so make a
+# new one after changing machines.
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import athlete_dataset
+from benchmarks.common import best_time, print_row
+from benchmarks.synthetic import row_count, size_name, synthetic_csv
+from dataset_cache import cache_location, load_dataset
+from query_engine import QueryEngine, Query, Equals, Between, OneOf, Prefix
+
+# CONSTANTS #
+DEFAULT_SIZES = ("10k", "100k", "1m")
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_DATA_FOLDER = os.path.join(tempfile.gettempdir(), "athlete_synthetic")
+# A result more than this fraction slower than the baseline is a regression,
+# unless it is only slower by less than NOISE_MS
+DEFAULT_TOLERANCE = 0.3
+NOISE_MS = 1
+# Every result is the best of REPEATS runs, from this many rows up of a single run
+REPEATS = 5
+LARGE_ROWS = 10000000
+# Rows the stand-in table shows at once, as the Table page does in a 700x600 window
+VISIBLE_ROWS = 19
+PAGE_SIZE = "100"
+FILTERS = {
+    "equals": Query(Equals("Team", "United States")),
+    "equals ignoring case": Query(Equals("Sport", "swimming", ignore_case=True)),
+    "between": Query(Between("Age", 20, 30)),
+    "one of": Query(OneOf("Year", [1992, 1996, 2000])),
+    "prefix": Query(Prefix("Team", "ger")),
+}
+MULTI_FILTERS = {
+    "two filters": Query(Equals("Sex", "F"), Equals("Year", 2000)),
+    "three filters": Query(Equals("Sex", "F"), Between("Year", 1960, 2000), Equals("Sport", "Athletics")),
+    # The five filters of the Filter page
+    "five filters": Query(Equals("Sex", "M"), Equals("Age", 24), Equals("Team", "France"),
+        Equals("Year", 2000), Equals("Sport", "Athletics")),
+}
+
+
+# CLASSES #
+class HeadlessWidget:
+    # Accepts and ignores every call a TablePage makes on its labels and scrollbar
+    def config(self, **options):
+        pass
+
+    def set(self, *values):
+        pass
+
+
+class HeadlessChoice(HeadlessWidget):
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class HeadlessTreeview(HeadlessWidget):
+    # Keeps its items in a dict and a list the way Tk keeps them in the widget
+    def __init__(self):
+        self.items = {}
+        self.order = []
+        self.next_item = 0
+
+    def heading(self, identifier, **options):
+        pass
+
+    def column(self, identifier, **options):
+        pass
+
+    def get_children(self, item=""):
+        return tuple(self.order)
+
+    def insert(self, parent, index, values=()):
+        item = f"I{self.next_item:03X}"
+        self.next_item += 1
+        self.items[item] = values
+        self.order.append(item)
+        return item
+
+    def item(self, item, values=None):
+        self.items[item] = values
+
+    def delete(self, *items):
+        for item in items:
+            del self.items[item]
+        removed = set(items)
+        self.order = [item for item in self.order if item not in removed]
+
+
+class HeadlessTablePage(athlete_dataset.TablePage):
+    # The TablePage methods over stand-in widgets, without a Tk window
+    def __init__(self, page_size=athlete_dataset.TABLE_PAGE_SIZES[0]):
+        self.reset_state()
+        self.table = HeadlessTreeview()
+        self.scrollbar = HeadlessWidget()
+        self.filter_info = HeadlessWidget()
+        self.count_info = HeadlessWidget()
+        self.page_info = HeadlessWidget()
+        self.mode_choice = HeadlessChoice(athlete_dataset.TABLE_MODES[0])
+        self.page_size_choice = HeadlessChoice(page_size)
+
+    def visible_rows(self):
+        return VISIBLE_ROWS
+
+
+# FUNCTIONS #
+def timed(function, rows):
+    # Milliseconds of the best of a few runs, or of one run for the largest datasets
+    return best_time(function, repeat=1 if rows >= LARGE_ROWS else REPEATS)
+
+
+def time_load(path, rows):
+    def cold():
+        shutil.rmtree(cache_location(path), ignore_errors=True)
+        load_dataset(path)
+    results = {"load cold": timed(cold, rows)}
+    results["load cached"] = timed(lambda: load_dataset(path), rows)
+    return results
+
+
+def time_index(dataset, rows):
+    # The engine indexes the five filter columns as it is made
+    return {"index": timed(lambda: QueryEngine(dataset), rows)}
+
+
+def time_queries(engine, queries, rows):
+    # Every query from an empty result cache, so nothing is answered from an earlier run
+    results = {}
+    for name, query in queries.items():
+        def run():
+            engine.cache.clear()
+            engine.positions(query)
+        results[name] = timed(run, rows)
+    return results
+
+
+def time_table(engine, rows):
+    # update() after a filter, for a small and a large result, and paging through a large one
+    results = {}
+    page = HeadlessTablePage()
+    athlete_dataset.app = SimpleNamespace(frame=page, frames={athlete_dataset.TablePage: page})
+    for name, query in (("table small result", MULTI_FILTERS["three filters"]), ("table whole dataset", Query())):
+        result = engine.run(query)
+        result.count()
+
+        def update():
+            athlete_dataset.filtered_result = result
+            athlete_dataset.current_filters = query.describe()
+            athlete_dataset.updated_dataset = True
+            athlete_dataset.update()
+        results[name] = timed(update, rows)
+        assert len(page.table.get_children()) == min(VISIBLE_ROWS, len(result))
+
+    paged = HeadlessTablePage(PAGE_SIZE)
+    paged.show_result(engine.run(Query()))
+
+    def next_pages():
+        for number in range(10):
+            paged.show_page(number)
+    results["table 10 page changes"] = timed(next_pages, rows)
+    return results
+
+
+def time_export(engine, rows, folder):
+    # About a quarter of the rows, the female athletes, in two of the formats
+    result = engine.run(Query(Equals("Sex", "F")))
+    results = {}
+    for extension in (".csv", ".jsonl"):
+        path = os.path.join(folder, "export" + extension)
+        results[f"export {extension[1:]}"] = timed(lambda: result.export(path), rows)
+        os.remove(path)
+    return results
+
+
+def run_size(rows, data_folder, seed):
+    path = synthetic_csv(data_folder, rows, seed)
+    results = time_load(path, rows)
+    dataset = load_dataset(path)
+    results.update(time_index(dataset, rows))
+    engine = QueryEngine(dataset)
+    results.update(time_queries(engine, FILTERS, rows))
+    results.update(time_queries(engine, MULTI_FILTERS, rows))
+    results.update(time_table(engine, rows))
+    with tempfile.TemporaryDirectory() as folder:
+        results.update(time_export(engine, rows, folder))
+    return {name: round(ms, 3) for name, ms in results.items()}
+
+
+def environment():
+    return {
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    # Prints every result beside its baseline and returns the names of the regressions
+    regressions = []
+    print_row("benchmark", "baseline", "now", "change")
+    for size, timings in results.items():
+        for name, ms in timings.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None:
+                print_row(f"{size} {name}", "-", f"{ms:.2f} ms", "new")
+                continue
+            change = (ms - before) / before if before > 0 else 0
+            slower = change > tolerance and ms - before > NOISE_MS
+            if slower:
+                regressions.append(f"{size} {name}")
+            print_row(f"{size} {name}", f"{before:.2f} ms", f"{ms:.2f} ms",
+                f"{change:+.0%}" + (" SLOWER" if slower else ""))
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Time the data handling behind the GUI on synthetic datasets.")
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES), help="row counts such as 10k 100k 1m 10m")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-folder", default=DEFAULT_DATA_FOLDER, help="where the synthetic CSV files are kept")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file the results are written to")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="slowdown allowed, 0.3 is 30%%")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    options = parser.parse_args(arguments)
+
+    results = {}
+    for size in options.sizes:
+        rows = row_count(size)
+        print(f"{size_name(rows)} rows...", file=sys.stderr)
+        results[size_name(rows)] = run_size(rows, options.data_folder, options.seed)
+    report = {"environment": environment(), "seed": options.seed, "results": results}
+    with open(options.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {options.output}")
+
+    baseline = {"results": {}}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get("seed") != options.seed:
+            print("The baseline was made with another seed, the datasets differ")
+    else:
+        print(f"No baseline at {options.baseline}, run with --save-baseline to make one")
+    regressions = compare(results, baseline["results"], options.tolerance)
+
+    if options.save_baseline:
+        with open(options.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {options.baseline}")
+    elif len(regressions) > 0:
+        print(f"{len(regressions)} benchmark(s) slower than the baseline: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# File: benchmarks/summary_bench.py
+# Description:
+# Times the summaries of the Table page for the whole dataset and for a
+# filtered selection: pandas groupby on a copy of the filtered rows, as a
+# script would do it, against the code-based summaries of aggregation.py.
+# The summaries are timed on an empty cache, from the cache, and for a
+# filter on the grouped column, which is answered from the cached summary.
+
+from aggregation import Summaries
+from benchmarks.common import best_time, dataset_path, print_row
+from query_engine import QueryEngine, Query, Equals, Prefix, Between
+
+
+# FUNCTIONS #
+def pandas_summary(dataset, positions, name):
+    rows = dataset if positions is None else dataset.iloc[positions]
+    if name == "Medals per Team":
+        return rows.groupby(["Team", "Medal"], observed=True).size().unstack(fill_value=0)
+    if name == "Athletes per Year":
+        return rows.groupby("Year", observed=True)["ID"].agg(["nunique", "size"])
+    return rows.groupby("Sport", observed=True)[["Age", "Height", "Weight"]].agg(["mean", "median"])
+
+
+def main():
+    engine = QueryEngine.from_csv(dataset_path())
+    summaries = Summaries(engine)
+    names = list(summaries.summaries())
+    # Builds the group codes of every column used, as the first summary in the GUI does
+    for name in names:
+        summaries.summary(name, Query())
+    queries = {"whole dataset": Query(), "Sex: F": Query(Equals("Sex", "F"))}
+    narrower = {
+        "Medals per Team": Prefix("Team", "United"),
+        "Athletes per Year": Between("Year", 1960, 2000),
+        "Averages per Sport": Prefix("Sport", "S"),
+    }
+
+    print_row("summary", "pandas groupby", "uncached", "cached", "group filter")
+    for name in names:
+        for description, query in queries.items():
+            positions = engine.positions(query)
+            pandas_ms = best_time(lambda: pandas_summary(engine.dataset, positions, name), repeat=3)
+
+            def uncached():
+                summaries.entries.clear()
+                summaries.summary(name, query)
+            uncached_ms = best_time(uncached, repeat=3)
+            cached_ms = best_time(lambda: summaries.summary(name, query))
+
+            def group_filter():
+                summaries.entries.pop((name, query.where(narrower[name]).key()), None)
+                summaries.summary(name, query.where(narrower[name]))
+            group_ms = best_time(group_filter)
+            print_row(f"{name}, {description}", f"{pandas_ms:.1f} ms", f"{uncached_ms:.1f} ms",
+                f"{cached_ms:.3f} ms", f"{group_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
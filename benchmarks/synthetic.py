@@ -0,0 +1,182 @@
+# File: benchmarks/synthetic.py
+# Description:
+# Generates athlete_events-shaped CSV files of any size, with the columns of
+# the shortened dataset (ID, Sex, Age, Team, Year, Sport, Height, Weight,
+# Medal) and cardinalities close to the full Kaggle file: about 1,200 teams
+# (230 nations plus numbered second teams such as "France-1"), 66 sports and
+# the 35 years with Summer or Winter Games from 1896 to 2016. Team and Sport
+# sizes are skewed the way the real ones are, every athlete takes part one to
+# a few times, and Age, Height and Weight are missing about as often as in
+# the real data. The same row count and seed always give the same file.
+#
+# Rows are generated and written a million at a time, so a 10M-row file needs
+# little memory. From the console:
+#     python -m benchmarks.synthetic 1m synthetic_1m.csv [--seed 0]
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# CONSTANTS #
+CHUNK_ROWS = 1000000
+ROWS_PER_ATHLETE = 2
+NATIONS = (
+    "United States", "France", "Great Britain", "Italy", "Germany", "Canada", "Japan", "Sweden",
+    "Australia", "Hungary", "Poland", "Switzerland", "Netherlands", "Finland", "China", "Spain",
+    "Norway", "Russia", "Austria", "Czechoslovakia", "Brazil", "Belgium", "Denmark", "South Korea",
+)
+NATION_COUNT = 230
+TEAM_COUNT = 1184
+SPORTS = (
+    "Athletics", "Gymnastics", "Swimming", "Shooting", "Cycling", "Fencing", "Rowing", "Cross Country Skiing",
+    "Alpine Skiing", "Wrestling", "Football", "Sailing", "Equestrianism", "Canoeing", "Boxing", "Speed Skating",
+    "Ice Hockey", "Hockey", "Biathlon", "Basketball", "Weightlifting", "Water Polo", "Judo", "Handball",
+    "Art Competitions", "Bobsleigh", "Volleyball", "Diving", "Ski Jumping", "Tennis", "Figure Skating",
+    "Archery", "Luge", "Table Tennis", "Badminton", "Nordic Combined", "Modern Pentathlon", "Synchronized Swimming",
+    "Freestyle Skiing", "Short Track Speed Skating", "Baseball", "Snowboarding", "Taekwondo", "Softball",
+    "Rhythmic Gymnastics", "Triathlon", "Beach Volleyball", "Curling", "Skeleton", "Rugby", "Trampolining",
+    "Golf", "Rugby Sevens", "Polo", "Tug-Of-War", "Lacrosse", "Cricket", "Motorboating", "Military Ski Patrol",
+    "Croquet", "Jeu De Paume", "Racquets", "Alpinism", "Basque Pelota", "Roque", "Aeronautics",
+)
+# 1906 held the Intercalated Games
+SUMMER_YEARS = sorted([year for year in range(1896, 2017, 4) if year not in (1916, 1940, 1944)] + [1906])
+WINTER_YEARS = [year for year in range(1924, 1993, 4) if year not in (1940, 1944)] + list(range(1994, 2015, 4))
+MEDALS = np.array(["Gold", "Silver", "Bronze"], dtype=object)
+FEMALE_SHARE = 0.275
+MEDAL_SHARE = 0.147
+MISSING_AGE = 0.035
+MISSING_HEIGHT = 0.22
+MISSING_WEIGHT = 0.23
+
+
+# FUNCTIONS #
+def row_count(text):
+    # "10k", "1m" or a plain number of rows
+    text = text.lower()
+    for suffix, factor in (("k", 10**3), ("m", 10**6)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def size_name(rows):
+    for suffix, factor in (("m", 10**6), ("k", 10**3)):
+        if rows >= factor and rows % factor == 0:
+            return f"{rows // factor}{suffix}"
+    return str(rows)
+
+
+def zipf_weights(count, exponent=1.1):
+    weights = 1 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def team_names():
+    # Nations first, then their numbered second and third teams, rarest last
+    nations = list(NATIONS) + [f"Nation {number}" for number in range(len(NATIONS) + 1, NATION_COUNT + 1)]
+    teams = list(nations)
+    suffix = 1
+    while len(teams) < TEAM_COUNT:
+        teams += [f"{nation}-{suffix}" for nation in nations[:TEAM_COUNT - len(teams)]]
+        suffix += 1
+    return np.array(teams, dtype=object)
+
+
+def games_years():
+    # Every Games year once, later Games weighted more as they had more athletes
+    years = np.array(sorted(set(SUMMER_YEARS) | set(WINTER_YEARS)))
+    weights = (years - 1880) ** 1.5
+    return years, weights / weights.sum()
+
+
+def synthetic_chunk(rows, first_id, generator, teams, years, year_weights):
+    athletes = max(1, rows // ROWS_PER_ATHLETE)
+    # What belongs to the athlete: sex, team, sport, build and year of birth
+    female = generator.random(athletes) < FEMALE_SHARE
+    team = generator.choice(len(teams), athletes, p=zipf_weights(len(teams)))
+    sport = generator.choice(len(SPORTS), athletes, p=zipf_weights(len(SPORTS), 0.9))
+    first_year = generator.choice(len(years), athletes, p=year_weights)
+    height = np.where(female, generator.normal(168, 8, athletes), generator.normal(179, 9, athletes))
+    weight = np.where(female, generator.normal(60, 9, athletes), generator.normal(76, 13, athletes))
+    born = years[first_year] - np.clip(generator.normal(25, 5, athletes), 10, 70)
+
+    # Every athlete has at least one row, the rest go to random athletes, sorted by ID as in the real file
+    athlete = np.sort(np.concatenate((np.arange(athletes), generator.integers(0, athletes, rows - athletes))))
+    # Later rows of an athlete are later Games, a few years apart
+    repeat = np.arange(rows) - np.searchsorted(athlete, athlete)
+    year = years[np.minimum(first_year[athlete] + repeat * generator.integers(1, 3, rows), len(years) - 1)]
+
+    age = np.round(year - born[athlete])
+    age[generator.random(rows) < MISSING_AGE] = np.nan
+    row_height = np.round(height[athlete])
+    row_height[generator.random(rows) < MISSING_HEIGHT] = np.nan
+    row_weight = np.round(weight[athlete], 1)
+    row_weight[generator.random(rows) < MISSING_WEIGHT] = np.nan
+    medal = np.full(rows, None, dtype=object)
+    won = generator.random(rows) < MEDAL_SHARE
+    medal[won] = MEDALS[generator.integers(0, 3, int(won.sum()))]
+
+    return pd.DataFrame({
+        "ID": first_id + athlete,
+        "Sex": np.where(female[athlete], "F", "M"),
+        "Age": age,
+        "Team": teams[team[athlete]],
+        "Year": year,
+        "Sport": np.array(SPORTS, dtype=object)[sport[athlete]],
+        "Height": row_height,
+        "Weight": row_weight,
+        "Medal": medal,
+    })
+
+
+def synthetic_chunks(rows, seed=0):
+    # The rows of the synthetic dataset, CHUNK_ROWS at a time. Each chunk has its own
+    # athletes and its own random stream, so a chunk does not depend on the ones before
+    teams = team_names()
+    years, year_weights = games_years()
+    first_id = 1
+    for number, start in enumerate(range(0, rows, CHUNK_ROWS)):
+        size = min(CHUNK_ROWS, rows - start)
+        generator = np.random.default_rng([seed, number])
+        chunk = synthetic_chunk(size, first_id, generator, teams, years, year_weights)
+        first_id += size // ROWS_PER_ATHLETE + 1
+        yield chunk
+
+
+def synthetic_dataset(rows, seed=0):
+    return pd.concat(synthetic_chunks(rows, seed), ignore_index=True)
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    # Written to a temporary name first, so an interrupted run never leaves a short file behind
+    partial = path + ".partial"
+    with open(partial, "w", newline="", encoding="utf-8") as file:
+        for number, chunk in enumerate(synthetic_chunks(rows, seed)):
+            chunk.to_csv(file, header=(number == 0), index=False)
+    os.replace(partial, path)
+    return path
+
+
+def synthetic_csv(folder, rows, seed=0):
+    # The path of the synthetic file of this size and seed in folder, generated the first time
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"athlete_events_synthetic_{size_name(rows)}_seed{seed}.csv")
+    if not os.path.exists(path):
+        write_synthetic_csv(path, rows, seed)
+    return path
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic athlete_events-shaped CSV file.")
+    parser.add_argument("rows", help="number of rows, e.g. 100k or 10m")
+    parser.add_argument("path", help="CSV file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    options = parser.parse_args(arguments)
+    write_synthetic_csv(options.path, row_count(options.rows), options.seed)
+    print(f"{row_count(options.rows)} rows written to {options.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# File: data_export.py
+# Description:
+# Streaming export of filtered rows to CSV, gzip-compressed CSV, Parquet or
+# JSON Lines. Rows are written in chunks taken straight from the base dataset
+# by row position, so only one chunk is ever copied in memory and a progress
+# callback can report (and cancel) between chunks.
+#
+# Parquet needs the optional pyarrow package, which is only imported when a
+# Parquet file is actually written. The formats themselves are listed in
+# export_formats.py.
+
+import gzip
+import os
+
+import numpy as np
+
+from export_formats import format_for_path
+
+# CONSTANTS #
+EXPORT_CHUNK_ROWS = 50000
+# Decimal digits a float32 value holds reliably
+FLOAT32_DIGITS = 7
+
+
+# FUNCTIONS #
+def export_rows(dataset, positions, path, export_format=None, columns=None, chunk_rows=EXPORT_CHUNK_ROWS, report=None):
+    # positions are the rows of dataset to write, or None for all of them.
+    # report(fraction) is called before every chunk, an exception raised by it
+    # (for instance a cancelled task) stops the export and removes the file
+    if export_format is None:
+        export_format = format_for_path(path)
+    # Columns are picked per chunk too, selecting them up front could copy whole columns
+    if columns is None:
+        column_positions = slice(None)
+    else:
+        column_positions = [dataset.columns.get_loc(column) for column in columns]
+    row_count = len(dataset) if positions is None else len(positions)
+
+    def chunks():
+        for start in range(0, max(row_count, 1), chunk_rows):
+            if report is not None:
+                report(start / max(row_count, 1))
+            if positions is None:
+                yield dataset.iloc[start:start + chunk_rows, column_positions]
+            else:
+                yield dataset.iloc[positions[start:start + chunk_rows], column_positions]
+
+    try:
+        WRITERS[export_format](chunks(), path)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return row_count
+
+
+def write_csv(chunks, path):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        write_csv_chunks(chunks, file)
+
+
+def write_csv_gz(chunks, path):
+    with gzip.open(path, "wt", newline="", encoding="utf-8") as file:
+        write_csv_chunks(chunks, file)
+
+
+def write_csv_chunks(chunks, file):
+    for number, chunk in enumerate(chunks):
+        chunk.to_csv(file, header=(number == 0), index=False)
+
+
+def float32_as_written(values):
+    # float32 values as the float64 nearest to their first FLOAT32_DIGITS digits,
+    # so a weight of 65.3 is written as 65.3 and not as 65.3000030518
+    values = values.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    scale = 10.0 ** (FLOAT32_DIGITS - 1 - np.where(np.isfinite(magnitude), magnitude, 0))
+    return np.round(values * scale) / scale
+
+
+def write_jsonl(chunks, path):
+    with open(path, "w", encoding="utf-8") as file:
+        for chunk in chunks:
+            if len(chunk) > 0:
+                # CSV and Parquet keep float32 columns as they are, JSON would print them as float64
+                chunk = chunk.assign(**{column: float32_as_written(chunk[column].to_numpy())
+                    for column in chunk.columns if chunk[column].dtype == np.float32})
+                text = chunk.to_json(orient="records", lines=True)
+                file.write(text if text.endswith("\n") else text + "\n")
+
+
+def write_parquet(chunks, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Saving as Parquet needs the pyarrow package (pip install pyarrow)")
+    writer = None
+    try:
+        # Every chunk becomes a row group of the same file
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {
+    "csv": write_csv,
+    "csv.gz": write_csv_gz,
+    "parquet": write_parquet,
+    "jsonl": write_jsonl,
+}
@@ -0,0 +1,236 @@
+# File: data_source.py
+# Description:
+# The athlete data as one dataset spread over any number of CSV files, for
+# example the full athlete_events.csv plus a file per newer Games. Paths may
+# be glob patterns ("games/*.csv"), the files are read in sorted order and
+# must share the columns of the first one.
+#
+# A DataSource works in one of two modes:
+#     memory   every file is loaded (memory-mapped from its binary cache where
+#              possible) and queries are answered by the QueryEngine index
+#     chunked  nothing is held in memory. Every query reads the files chunk by
+#              chunk, from the memory-mapped cache when one is up to date and
+#              with read_csv(chunksize=...) otherwise, and the matching rows
+#              are streamed out one chunk at a time
+# "auto" picks memory mode when the files fit comfortably in the available
+# memory, for example
+#     source = DataSource(["athlete_events.csv", "games/*.csv"], mode="auto")
+#     for rows in source.scan(Query(Equals("Sex", "F"), Equals("Year", 2016))):
+#         print(rows)
+#
+# A chunk is filtered by testing each condition once per distinct value in
+# the chunk, with condition.matches(), and keeping the rows holding one of the
+# values that matched, so the conditions behave as they do in the index.
+#
+# It can also be run from the console to save the rows matching a few filters:
+#     python data_source.py athlete_events.csv "games/*.csv" --mode chunked --where Sex=F Year=2016 --output matches.csv
+
+import argparse
+import glob
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from data_export import WRITERS
+from export_formats import format_for_path
+from dataset_cache import cached_dataset, compact_column, load_dataset
+from query_engine import QueryEngine, Query, Equals
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# CONSTANTS #
+DATA_MODES = ("auto", "memory", "chunked")
+SCAN_CHUNK_ROWS = 100000
+# Parsing a CSV with read_csv takes a few times the size of the file at its peak,
+# auto mode only loads the files when that is less than half the available memory
+PARSE_MEMORY_FACTOR = 4
+MEMORY_FRACTION = 0.5
+
+
+# FUNCTIONS #
+def expand_paths(patterns):
+    # The files named by paths and glob patterns, each once, in the order given
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if len(matches) == 0:
+                raise FileNotFoundError(f"No files match {pattern}")
+        elif os.path.isfile(pattern):
+            matches = [pattern]
+        else:
+            raise FileNotFoundError(f"{pattern} does not exist")
+        paths += [path for path in matches if path not in paths]
+    if len(paths) == 0:
+        raise FileNotFoundError("No data files were given")
+    return paths
+
+
+def available_memory():
+    # Bytes of memory available to this process, None when it cannot be found out.
+    # psutil is optional, /proc/meminfo covers Linux without it
+    if psutil is not None:
+        return psutil.virtual_memory().available
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def combine(frames):
+    # One dataset from the datasets of several files. Categorical columns keep a single
+    # category list holding the values of every file, rather than turning into strings
+    columns = list(frames[0].columns)
+    for number, frame in enumerate(frames[1:], start=2):
+        missing = [column for column in columns if column not in frame.columns]
+        if len(missing) > 0:
+            raise ValueError(f"Data file {number} has no {', '.join(missing)} column")
+    combined = {}
+    for column in columns:
+        parts = [frame[column] for frame in frames]
+        if all(part.dtype == "category" for part in parts):
+            combined[column] = pd.Series(union_categoricals([part.array for part in parts], sort_categories=True))
+        else:
+            combined[column] = compact_column(pd.concat(parts, ignore_index=True))
+    return pd.DataFrame(combined)
+
+
+def matching_rows(chunk, conditions):
+    # Boolean mask of the rows of chunk that meet every condition
+    keep = np.ones(len(chunk), dtype=bool)
+    for condition in conditions:
+        values = chunk[condition.column]
+        # Missing values never meet a condition, as they are not in the index either
+        matching = [value for value in values.dropna().unique() if condition.matches(value)]
+        keep &= values.isin(matching).to_numpy(dtype=bool, na_value=False)
+    return keep
+
+
+def parse_value(text):
+    # Whole numbers are compared as numbers, everything else as text
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+# CLASSES #
+class DataSource:
+    def __init__(self, paths, mode="auto", chunk_rows=SCAN_CHUNK_ROWS):
+        if isinstance(paths, str):
+            paths = [paths]
+        if mode not in DATA_MODES:
+            raise ValueError(f"Unknown mode {mode}, use one of {', '.join(DATA_MODES)}")
+        self.paths = expand_paths(paths)
+        self.chunk_rows = chunk_rows
+        if mode == "auto":
+            mode = "memory" if self.fits_in_memory() else "chunked"
+        self.mode = mode
+        self.query_engine = None
+
+    def size(self):
+        return sum(os.path.getsize(path) for path in self.paths)
+
+    def fits_in_memory(self):
+        available = available_memory()
+        return available is None or self.size() * PARSE_MEMORY_FACTOR < available * MEMORY_FRACTION
+
+    def engine(self):
+        # The QueryEngine over every file, loaded on first use whatever the mode
+        if self.query_engine is None:
+            frames = [load_dataset(path) for path in self.paths]
+            self.query_engine = QueryEngine(frames[0] if len(frames) == 1 else combine(frames))
+        return self.query_engine
+
+    def chunks(self, columns=None):
+        # The rows of every file in turn, at most chunk_rows of them at a time
+        for path in self.paths:
+            dataset = cached_dataset(path)
+            if dataset is None:
+                yield from pd.read_csv(path, usecols=columns, chunksize=self.chunk_rows)
+                continue
+            if columns is not None:
+                dataset = dataset[list(columns)]
+            for start in range(0, len(dataset), self.chunk_rows):
+                yield dataset.iloc[start:start + self.chunk_rows]
+
+    def scan(self, query, columns=None):
+        # The rows matching query, as one DataFrame per chunk. In chunked mode only the
+        # columns asked for and the ones the query looks at are read
+        if self.mode == "memory":
+            yield from self.engine().run(query).chunks(self.chunk_rows, columns)
+            return
+        read = None
+        if columns is not None:
+            read = list(dict.fromkeys(list(columns) + [condition.column for condition in query.conditions]))
+        for chunk in self.chunks(read):
+            rows = chunk[matching_rows(chunk, query.conditions)]
+            yield rows if columns is None else rows[list(columns)]
+
+    def count(self, query):
+        if self.mode == "memory":
+            return self.engine().count(query)
+        if len(query) == 0:
+            return sum(len(chunk) for chunk in self.chunks())
+        columns = list(dict.fromkeys(condition.column for condition in query.conditions))
+        return sum(int(matching_rows(chunk, query.conditions).sum()) for chunk in self.chunks(columns))
+
+    def export(self, query, path, export_format=None, columns=None):
+        # Writes the matching rows as they are found and returns how many there were
+        if export_format is None:
+            export_format = format_for_path(path)
+        row_count = 0
+
+        def counted(chunks):
+            nonlocal row_count
+            for chunk in chunks:
+                row_count += len(chunk)
+                yield chunk
+
+        try:
+            WRITERS[export_format](counted(self.scan(query, columns)), path)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return row_count
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Save the athletes matching some filters from one or more CSV files.")
+    parser.add_argument("paths", nargs="+", help="CSV files or glob patterns such as games/*.csv")
+    parser.add_argument("--mode", choices=DATA_MODES, default="auto", help="load the data or scan it in chunks")
+    parser.add_argument("--where", nargs="*", default=[], metavar="COLUMN=VALUE", help="filters, e.g. Sex=F Year=2016")
+    parser.add_argument("--columns", nargs="*", help="columns to save, all of them by default")
+    parser.add_argument("--output", help="file to write, the rows are counted when it is left out")
+    options = parser.parse_args(arguments)
+
+    conditions = []
+    for condition in options.where:
+        column, separator, value = condition.partition("=")
+        if separator == "":
+            parser.error(f"filters are given as COLUMN=VALUE, not {condition}")
+        conditions.append(Equals(column, parse_value(value)))
+    query = Query(*conditions)
+
+    source = DataSource(options.paths, options.mode)
+    print(f"{len(source.paths)} file(s), {source.mode} mode", file=sys.stderr)
+    if options.output is None:
+        print(source.count(query))
+    else:
+        row_count = source.export(query, options.output, columns=options.columns)
+        print(f"{row_count} rows written to {options.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# File: dataset_cache.py
+# Description:
+# Columnar binary cache for the athlete CSV files.
+# The first time a CSV is loaded it is parsed as usual, converted to compact
+# dtypes and written out as one NumPy .npy file per column next to the CSV.
+# Later loads memory-map those files instead of parsing the text again, so
+# start-up only touches the pages that are actually used.
+#
+# Every text column is dictionary encoded: an integer code per row plus the
+# list of distinct values in metadata.json, loaded as a pandas categorical, so
+# a filter compares integer codes instead of strings. Numeric columns holding
+# only whole numbers (ID, Age, Height, Year) are narrowed to the smallest
+# integer type that holds them, nullable when values are missing, and other
+# numeric columns such as Weight are stored as float32.
+#
+# The cache is rebuilt whenever the CSV's modification time or size differs
+# from the values recorded when the cache was written. The new files are
+# written under temporary names and renamed over the old ones, so another
+# process that still has the old cache memory-mapped keeps reading it safely.
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# CONSTANTS #
+CACHE_DIRECTORY = ".athlete_cache"
+CACHE_VERSION = 2
+# Each integer type with the name of its nullable pandas counterpart, smallest first
+INTEGER_TYPES = (
+    (np.uint8, "UInt8"),
+    (np.int8, "Int8"),
+    (np.uint16, "UInt16"),
+    (np.int16, "Int16"),
+    (np.int32, "Int32"),
+    (np.int64, "Int64"),
+)
+
+
+# FUNCTIONS #
+def load_dataset(csv_path):
+    dataset = cached_dataset(csv_path)
+    if dataset is not None:
+        return dataset
+
+    dataset = compact_dataset(pd.read_csv(csv_path))
+    try:
+        write_cache(dataset, cache_location(csv_path), source_signature(csv_path))
+    except OSError:
+        # A read-only folder only costs the speed-up, the data is still loaded
+        pass
+    return dataset
+
+
+def cached_dataset(csv_path):
+    # The memory-mapped cache of the CSV, or None when there is no up-to-date one
+    cache_path = cache_location(csv_path)
+    metadata = read_metadata(cache_path)
+    if metadata is not None and metadata["version"] == CACHE_VERSION and metadata["source"] == source_signature(csv_path):
+        return read_cache(cache_path, metadata)
+    return None
+
+
+def cache_location(csv_path):
+    folder, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(folder, CACHE_DIRECTORY, name)
+
+
+def source_signature(csv_path):
+    status = os.stat(csv_path)
+    return {"mtime_ns": status.st_mtime_ns, "size": status.st_size}
+
+
+def read_metadata(cache_path):
+    try:
+        with open(os.path.join(cache_path, "metadata.json")) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def smallest_integer_type(values):
+    # values are the non-missing values of a whole-number column
+    low = values.min() if len(values) > 0 else 0
+    high = values.max() if len(values) > 0 else 0
+    for integer_type, nullable_type in INTEGER_TYPES:
+        limits = np.iinfo(integer_type)
+        if limits.min <= low and high <= limits.max:
+            return integer_type, nullable_type
+    return INTEGER_TYPES[-1]
+
+
+def is_text(series):
+    return isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(series.dtype) \
+        or pd.api.types.is_string_dtype(series.dtype)
+
+
+def compact_column(series):
+    if is_text(series):
+        return series.astype("category")
+    if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+        return series
+    present = series.dropna().to_numpy()
+    if np.all(present == np.round(present)):
+        integer_type, nullable_type = smallest_integer_type(present)
+        if series.isna().any():
+            # Nullable integers keep the missing ages as <NA> instead of forcing floats
+            return series.astype(nullable_type)
+        return series.astype(integer_type)
+    if pd.api.types.is_float_dtype(series):
+        return series.astype(np.float32)
+    return series
+
+
+def compact_dataset(dataset):
+    return pd.DataFrame({column: compact_column(dataset[column]) for column in dataset.columns})
+
+
+def save_array(path, values):
+    # Written to a temporary name and moved into place, never over the old file, so a
+    # process that has the old cache memory-mapped keeps reading the old data intact
+    partial = path + ".partial"
+    with open(partial, "wb") as file:
+        np.save(file, values)
+    os.replace(partial, path)
+
+
+def write_cache(dataset, cache_path, source):
+    os.makedirs(cache_path, exist_ok=True)
+    # metadata.json is written last, so a half-written cache is never used
+    metadata_path = os.path.join(cache_path, "metadata.json")
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    columns = []
+    for number, column in enumerate(dataset.columns):
+        series = dataset[column]
+        stem = os.path.join(cache_path, f"column{number}")
+        entry = {"name": column}
+        if is_text(series):
+            categorical = series.astype("category").array
+            save_array(stem + ".codes.npy", categorical.codes)
+            entry["kind"] = "category"
+            entry["categories"] = categorical.categories.tolist()
+        elif isinstance(series.array, pd.arrays.IntegerArray):
+            # Nullable integers are stored as their values plus the mask of missing entries
+            save_array(stem + ".npy", series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+            save_array(stem + ".mask.npy", series.isna().to_numpy())
+            entry["kind"] = "nullable"
+        else:
+            save_array(stem + ".npy", series.to_numpy())
+            entry["kind"] = "array"
+        columns.append(entry)
+
+    with open(metadata_path + ".partial", "w") as file:
+        json.dump({"version": CACHE_VERSION, "source": source, "rows": len(dataset), "columns": columns}, file)
+    os.replace(metadata_path + ".partial", metadata_path)
+
+
+def read_cache(cache_path, metadata):
+    columns = {}
+    for number, entry in enumerate(metadata["columns"]):
+        stem = os.path.join(cache_path, f"column{number}")
+        if entry["kind"] == "category":
+            codes = np.load(stem + ".codes.npy", mmap_mode="r")
+            values = pd.Categorical.from_codes(codes, categories=entry["categories"], validate=False)
+        elif entry["kind"] == "nullable":
+            values = pd.arrays.IntegerArray(np.load(stem + ".npy", mmap_mode="r"), np.load(stem + ".mask.npy", mmap_mode="r"))
+        else:
+            values = np.load(stem + ".npy", mmap_mode="r")
+        # copy=False keeps the memory-mapped arrays instead of copying them into the frame
+        columns[entry["name"]] = pd.Series(values, copy=False)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,217 @@
+# File: dataset_index.py
+# Description:
+# Lookup index for the five filter columns of the athlete dataset.
+# The index is built once when the dataset is loaded and maps every distinct
+# value of a column to the sorted array of row positions holding that value.
+# A single filter is then a dictionary lookup, and several filters become an
+# intersection of position arrays instead of repeated boolean-mask scans
+# over the whole DataFrame.
+#
+# Categorical columns are indexed from their integer codes: one stable sort
+# of the codes puts the rows of every value together, and each value's
+# positions are a slice of that one array. When a small result is narrowed
+# by a further filter, the value is translated to its category code once and
+# compared with the codes of just those rows.
+#
+# Sorting uses a permutation of all rows per column, built the first time the
+# column is sorted. The rows of a large result are taken from it in order,
+# a small result is sorted by the rank of its rows in it, so no values are
+# compared again however often the table is re-sorted.
+
+import bisect
+
+import numpy as np
+
+# CONSTANTS #
+INDEXED_COLUMNS = ("Sex", "Age", "Team", "Year", "Sport")
+EMPTY_POSITIONS = np.empty(0, dtype=np.intp)
+# Sorts after any character that can follow a prefix, bounding the values that start with it
+LAST_CHARACTER = "\U0010ffff"
+
+
+# FUNCTIONS #
+def intersect(a, b):
+    # Both arrays are sorted and unique, so the smaller one is looked up in the
+    # larger one with a binary search rather than merging the two arrays
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return EMPTY_POSITIONS
+    found = np.searchsorted(b, a)
+    found[found == len(b)] = 0
+    return a[b[found] == a]
+
+
+def union(arrays):
+    # The arrays come from different values of one column, so they never share a position
+    arrays = [positions for positions in arrays if len(positions) > 0]
+    if len(arrays) == 0:
+        return EMPTY_POSITIONS
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.sort(np.concatenate(arrays))
+
+
+# CLASSES #
+class DatasetIndex:
+    def __init__(self, df, columns=INDEXED_COLUMNS):
+        self.df = df
+        self.row_count = len(df)
+        self.columns = {}
+        # Sorted distinct values and case-folded lookups, built the first time a
+        # range or case-insensitive filter needs them
+        self.sorted_values = {}
+        self.folded_values = {}
+        # Case-folded distinct values in sorted order with the original values alongside,
+        # for prefix lookups, and category codes for narrowing results row by row
+        self.prefix_tables = {}
+        self.codes = {}
+        self.category_codes = {}
+        self.sort_orders = {}
+        for column in columns:
+            self.column_index(column)
+
+    def column_index(self, column):
+        # Columns beyond the five filter columns are indexed the first time they are queried.
+        # Each value maps to its ascending row positions, missing values (NaN) and
+        # unused categories are left out of the index
+        if column not in self.columns:
+            if self.df[column].dtype == "category":
+                self.columns[column] = self.code_index(column)
+            else:
+                self.columns[column] = self.df.groupby(column, sort=False, observed=True).indices
+        return self.columns[column]
+
+    def code_index(self, column):
+        codes = self.value_codes(column)
+        # A stable sort keeps the positions of every code ascending, the small
+        # integer codes are sorted with a radix sort
+        order = np.argsort(codes, kind="stable")
+        # Missing values have code -1 and come first
+        counts = np.bincount(codes + 1, minlength=len(self.df[column].cat.categories) + 1)
+        ends = np.cumsum(counts)
+        return {category: order[ends[code]:ends[code + 1]]
+            for code, category in enumerate(self.df[column].cat.categories) if counts[code + 1] > 0}
+
+    def positions(self, column, value):
+        return self.column_index(column).get(value, EMPTY_POSITIONS)
+
+    def count(self, column, value):
+        return len(self.positions(column, value))
+
+    def values(self, column):
+        if column not in self.sorted_values:
+            self.sorted_values[column] = sorted(self.column_index(column))
+        return self.sorted_values[column]
+
+    def values_ignoring_case(self, column, value):
+        # Every value of the column that equals value when case is ignored
+        if column not in self.folded_values:
+            folded = {}
+            for key in self.column_index(column):
+                folded.setdefault(str(key).casefold(), []).append(key)
+            self.folded_values[column] = folded
+        return self.folded_values[column].get(str(value).casefold(), [])
+
+    def values_with_prefix(self, column, prefix, limit=None):
+        # Values of the column starting with prefix when case is ignored, in alphabetical
+        # order. Two binary searches over the sorted values, however many there are
+        if column not in self.prefix_tables:
+            pairs = sorted((str(value).casefold(), value) for value in self.column_index(column))
+            self.prefix_tables[column] = ([folded for folded, _ in pairs], [value for _, value in pairs])
+        folded, values = self.prefix_tables[column]
+        prefix = str(prefix).casefold()
+        start = bisect.bisect_left(folded, prefix)
+        stop = bisect.bisect_left(folded, prefix + LAST_CHARACTER, lo=start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return values[start:stop]
+
+    def value_codes(self, column):
+        # The category code of every row of a categorical column, -1 where it is missing
+        if column not in self.codes:
+            self.codes[column] = np.asarray(self.df[column].array.codes)
+        return self.codes[column]
+
+    def restrict(self, positions, column, values):
+        # The rows of positions whose value is one of values. Categorical columns
+        # are checked at those rows only, so a small result is never widened to
+        # the rows of every value first
+        if self.df[column].dtype != "category":
+            return intersect(positions, union(self.positions(column, value) for value in values))
+        if column not in self.category_codes:
+            self.category_codes[column] = {category: code for code, category in enumerate(self.df[column].cat.categories)}
+        # Each value is translated to its code once, values that are not categories match no rows
+        wanted = [self.category_codes[column][value] for value in values if value in self.category_codes[column]]
+        codes = self.value_codes(column)[positions]
+        if len(wanted) == 1:
+            return positions[codes == wanted[0]]
+        return positions[np.isin(codes, wanted)]
+
+    def sort_order(self, column):
+        # (every row position ordered by the column's value, the rank of every row in
+        # that order, the number of missing values). Missing values come last and
+        # equal values keep their row order
+        if column not in self.sort_orders:
+            series = self.df[column]
+            if series.dtype == "category":
+                categories = np.asarray(series.cat.categories, dtype=object)
+                category_ranks = np.empty(len(categories) + 1, dtype=np.intp)
+                category_ranks[np.argsort(categories, kind="stable")] = np.arange(len(categories))
+                # The extra last rank is taken by code -1, missing values
+                category_ranks[-1] = len(categories)
+                keys = category_ranks[self.value_codes(column)]
+            else:
+                keys = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            order = np.argsort(keys, kind="stable")
+            ranks = np.empty(self.row_count, dtype=np.intp)
+            ranks[order] = np.arange(self.row_count)
+            self.sort_orders[column] = (order, ranks, int(series.isna().sum()))
+        return self.sort_orders[column]
+
+    def sorted_positions(self, positions, column, descending=False):
+        # positions (None for every row) in the order of the column's values
+        order, ranks, missing = self.sort_order(column)
+        if positions is None or len(positions) == self.row_count:
+            result = order
+        else:
+            positions = np.asarray(positions)
+            if len(positions) * np.log2(max(len(positions), 2)) >= self.row_count:
+                # Walking the whole permutation once beats sorting this many ranks
+                selected = np.zeros(self.row_count, dtype=bool)
+                selected[positions] = True
+                result = order[selected[order]]
+            else:
+                result = positions[np.argsort(ranks[positions])]
+        if descending:
+            # Only the rows with a value are reversed, missing values stay at the end
+            present = np.searchsorted(ranks[result], self.row_count - missing)
+            return np.concatenate((result[present - 1::-1] if present > 0 else result[:0], result[present:]))
+        return result
+
+    def all_positions(self):
+        return np.arange(self.row_count)
+
+    def refine(self, positions, column, value):
+        # `positions` of None stands for every row in the dataset
+        if positions is None:
+            return self.positions(column, value)
+        matches = self.positions(column, value)
+        # Comparing the codes of the rows so far beats a binary search through the
+        # value's positions once there are fewer of them
+        if self.df[column].dtype == "category" and len(positions) < len(matches):
+            return self.restrict(positions, column, [value])
+        return intersect(positions, matches)
+
+    def query(self, filters):
+        # filters is a sequence of (column, value) pairs, all of which must match.
+        # Starting from the smallest position array keeps every intersection cheap
+        matches = sorted((self.positions(column, value) for column, value in filters), key=len)
+        if len(matches) == 0:
+            return self.all_positions()
+        result = matches[0]
+        for positions in matches[1:]:
+            if len(result) == 0:
+                break
+            result = intersect(result, positions)
+        return result
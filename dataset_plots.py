@@ -0,0 +1,93 @@
+# File: dataset_plots.py
+# Description:
+# The numbers behind the Graph page, worked out without matplotlib so they
+# can be computed on a worker thread. Each plotted column is binned once into
+# FINE_BINS narrow bins, stored as one small integer per row. The histogram of
+# any selection is then a bincount of those codes at the selected rows, merged
+# into the bars that are drawn, with no sorting or comparing of values.
+# Scatter plots of large selections are downsampled to evenly spaced rows.
+
+import numpy as np
+
+from selection import take
+
+# CONSTANTS #
+AXIS_LABELS = {
+    "Weight": "Weight (kg)",
+    "Height": "Height (cm)",
+    "Age": "Age (years)",
+}
+HISTOGRAM_BINS = 12
+# Number of precomputed bins across the whole range of a column, the bars are merged from them
+FINE_BINS = 240
+MISSING_BIN = FINE_BINS
+# Selections smaller than this are drawn as a scatter of the values by athlete ID,
+# as in the original plot()
+SCATTER_ROW_LIMIT = 100
+MAX_SCATTER_POINTS = 5000
+
+
+# FUNCTIONS #
+def plot_kind(row_count, kind="Auto"):
+    if kind != "Auto":
+        return kind
+    if row_count < SCATTER_ROW_LIMIT:
+        return "Scatter"
+    return "Histogram"
+
+
+# CLASSES #
+class BinnedColumn:
+    def __init__(self, values):
+        self.values = values
+        present = ~np.isnan(values)
+        if present.any():
+            self.low = float(values[present].min())
+            high = float(values[present].max())
+        else:
+            self.low = high = 0.0
+        self.width = (high - self.low) / FINE_BINS or 1.0
+        self.codes = np.full(len(values), MISSING_BIN, dtype=np.uint8)
+        self.codes[present] = np.minimum((values[present] - self.low) / self.width, FINE_BINS - 1).astype(np.uint8)
+
+    def histogram(self, positions, bins=HISTOGRAM_BINS):
+        # (edges, counts) of at most `bins` bars spanning the values at positions
+        counts = np.bincount(take(self.codes, positions), minlength=FINE_BINS + 1)[:FINE_BINS]
+        used = np.flatnonzero(counts)
+        if len(used) == 0:
+            return np.array([self.low, self.low + self.width]), np.zeros(1, dtype=np.int64)
+        first, last = used[0], used[-1] + 1
+        bins = min(bins, last - first)
+        starts = first + (np.arange(bins) * (last - first)) // bins
+        edges = self.low + np.append(starts, last) * self.width
+        return edges, np.add.reduceat(counts[first:last], starts - first)
+
+
+class DatasetPlots:
+    # Binned columns are built the first time they are plotted
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.columns = {}
+
+    def column(self, column):
+        if column not in self.columns:
+            values = self.dataset[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            self.columns[column] = BinnedColumn(values)
+        return self.columns[column]
+
+    def histogram(self, positions, column, bins=HISTOGRAM_BINS):
+        return self.column(column).histogram(positions, bins)
+
+    def scatter(self, positions, column, max_points=MAX_SCATTER_POINTS):
+        # (ID, value) pairs as an array of two columns, for the rows at positions
+        # that have a value, at most max_points of them
+        if len(positions) > max_points:
+            sample = np.linspace(0, len(positions) - 1, max_points).astype(np.int64)
+            if isinstance(positions, range):
+                positions = positions.start + sample
+            else:
+                positions = positions[sample]
+        values = take(self.column(column).values, positions)
+        ids = take(self.dataset["ID"].to_numpy(), positions)
+        present = ~np.isnan(values)
+        return np.column_stack((ids[present], values[present]))
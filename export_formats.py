@@ -0,0 +1,32 @@
+# File: export_formats.py
+# Description:
+# The file formats rows can be exported to, kept apart from data_export.py so
+# that the GUI can offer them in the save dialog without importing numpy
+# before the window is showing.
+
+import os
+
+# CONSTANTS #
+# Format name -> file extension, in the order they are offered in the save dialog
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "parquet": ".parquet",
+    "jsonl": ".jsonl",
+}
+FORMAT_DESCRIPTIONS = {
+    "csv": "CSV",
+    "csv.gz": "Compressed CSV",
+    "parquet": "Parquet",
+    "jsonl": "JSON Lines",
+}
+
+
+# FUNCTIONS #
+def format_for_path(path):
+    # The longest matching extension wins, so "x.csv.gz" is not taken for plain CSV
+    for export_format, extension in sorted(EXPORT_FORMATS.items(), key=lambda item: -len(item[1])):
+        if path.lower().endswith(extension):
+            return export_format
+    raise ValueError(f"Unknown file type for {os.path.basename(path)}, "
+        f"use one of {', '.join(EXPORT_FORMATS.values())}")
@@ -0,0 +1,207 @@
+# File: instrumentation.py
+# Description:
+# Timing of the slow operations of the GUI: loading the dataset, filtering,
+# filling the table, sorting, summarising and saving. Each operation records
+# its total time, the rows it produced and the change in resident memory, and
+# the same for each of its stages, for example one stage per filter applied:
+#
+#     with instrumentation.operation("filter") as timing:
+#         ...
+#         timing.stage("Sex", rows=len(matches))
+#         ...
+#         timing.set_rows(len(result))
+#
+# A stage ends where stage() is called and began where the previous one (or
+# the operation) ended. The last RECENT_OPERATIONS records are kept for the
+# Diagnostics page, and with a log file given each is also written to it as
+# one line of JSON.
+#
+# Recording is off until enable() is called. While it is off operation()
+# returns one shared object whose methods do nothing, so the timing calls left
+# in the code cost no more than a function call.
+#
+# profile_next() runs the next operation, on whichever thread it starts, under
+# cProfile and dumps the statistics to a file that pstats or snakeviz can read.
+# This works whether recording is on or not.
+
+import cProfile
+import collections
+import json
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# CONSTANTS #
+RECENT_OPERATIONS = 100
+
+# VARIABLES #
+recording = False
+log_file = None
+# Path the next operation is profiled to ("" for a generated name) or None,
+# and the file the last profile was written to
+profile_path = None
+last_profile = None
+records = collections.deque(maxlen=RECENT_OPERATIONS)
+# Made once, psutil.Process() takes far longer than reading the memory itself
+process = psutil.Process() if psutil is not None else None
+# Counts every operation recorded, so a display can tell when it is out of date
+sequence = 0
+lock = threading.Lock()
+
+
+# FUNCTIONS #
+def resident_memory():
+    # Resident memory of this process in bytes, psutil is optional and /proc covers Linux without it
+    if process is not None:
+        return process.memory_info().rss
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def enable(log_path=None):
+    # Starts recording operations, appending them to log_path as JSON lines when given
+    global recording
+    global log_file
+    with lock:
+        if log_file is not None:
+            log_file.close()
+        log_file = open(log_path, "a", encoding="utf-8") if log_path is not None else None
+        recording = True
+
+
+def disable():
+    global recording
+    global log_file
+    with lock:
+        recording = False
+        if log_file is not None:
+            log_file.close()
+            log_file = None
+
+
+def profile_next(path=None):
+    # The next operation is run under cProfile, its statistics are dumped to path,
+    # by default profile_<operation>_<time>.prof in the working folder
+    global profile_path
+    with lock:
+        profile_path = path if path is not None else ""
+
+
+def operation(name, **fields):
+    # A context manager timing the operation name. fields are added to its record
+    if not recording and profile_path is None:
+        return NO_OPERATION
+    return Operation(name, fields)
+
+
+def recent():
+    # The records kept, oldest first
+    with lock:
+        return list(records)
+
+
+def clear():
+    with lock:
+        records.clear()
+
+
+def add_record(record):
+    global sequence
+    with lock:
+        if recording:
+            records.append(record)
+            sequence += 1
+            if log_file is not None:
+                log_file.write(json.dumps(record) + "\n")
+                log_file.flush()
+
+
+# CLASSES #
+class NoOperation:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        return False
+
+    def stage(self, name, rows=None):
+        pass
+
+    def set_rows(self, rows):
+        pass
+
+
+NO_OPERATION = NoOperation()
+
+
+class Operation:
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.rows = None
+        self.stages = []
+        self.profiler = None
+        self.profile_path = None
+
+    def __enter__(self):
+        global profile_path
+        with lock:
+            if profile_path is not None:
+                self.profile_path = profile_path or f"profile_{self.name.replace(' ', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+                profile_path = None
+        self.started = time.time()
+        self.memory = self.stage_memory = resident_memory()
+        if self.profile_path is not None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = self.stage_start = time.perf_counter()
+        return self
+
+    def stage(self, name, rows=None):
+        # Ends the stage that began at the last stage() call or at the start
+        now = time.perf_counter()
+        memory = resident_memory()
+        self.stages.append({
+            "stage": name,
+            "ms": round((now - self.stage_start) * 1000, 3),
+            "rows": rows,
+            "memory_mb": round((memory - self.stage_memory) / 2**20, 2),
+        })
+        self.stage_memory = memory
+        # Reading the memory is left out of the next stage's time
+        self.stage_start = time.perf_counter()
+
+    def set_rows(self, rows):
+        self.rows = rows
+
+    def __exit__(self, kind, error, traceback):
+        global last_profile
+        elapsed = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.profile_path)
+            last_profile = os.path.abspath(self.profile_path)
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "operation": self.name,
+            "ms": round(elapsed * 1000, 3),
+            "rows": self.rows,
+            "memory_mb": round((resident_memory() - self.memory) / 2**20, 2),
+            "stages": self.stages,
+        }
+        record.update(self.fields)
+        if kind is not None:
+            # A cancelled task shows up as TaskCancelled
+            record["error"] = kind.__name__
+        if self.profile_path is not None:
+            record["profile"] = last_profile
+        add_record(record)
+        return False
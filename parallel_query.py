@@ -0,0 +1,366 @@
+# File: parallel_query.py
+# Description:
+# Runs filters and counts over the dataset on every core, for batch reports
+# on the full dataset and the large synthetic ones. The dataset is split into
+# partitions, either ranges of rows or one partition per Games year, and a
+# process pool works on the partitions side by side.
+#
+# The column arrays are copied once into shared memory blocks (the codes of a
+# categorical column, the values and missing mask of a nullable one) that the
+# workers attach to when the pool starts, so a task only sends its query and
+# the bounds of its partition, never any data. Partial results come back in
+# partition order: row positions are concatenated (and sorted when partitions
+# are by year), counts are added up.
+#
+# The minimum and maximum of every numeric column are kept per partition, and
+# a partition that cannot hold a row matching the query, such as a partition
+# of 1950s Games for a query on Year 2000, is skipped without being sent to
+# a worker.
+#
+#     with ParallelEngine(dataset, partition_by="Year") as engine:
+#         positions = engine.positions(Query(Equals("Sex", "F"), Between("Year", 1960, 2000)))
+#         counts = engine.counts([Query(Equals("Sport", sport)) for sport in sports])
+#         table = engine.group_counts(Query(Equals("Sex", "F")), ["Team", "Year"])
+#
+# The Filter page keeps using the QueryEngine index, which answers a single
+# query faster than any pool could start working on it.
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from dataset_index import EMPTY_POSITIONS
+from query_engine import Equals, Between, OneOf
+
+# CONSTANTS #
+PARTITIONS = ("rows", "Year")
+# Row partitions per worker, so a slow partition does not hold up the others for long
+PARTITIONS_PER_WORKER = 4
+# Group counts are kept in one bincount array while the combinations fit in it
+MAX_GROUP_COMBINATIONS = 10**7
+
+# VARIABLES #
+# Inside a worker: column -> (values, missing mask or None, categories or None), and
+# the row order of year partitions. Filled by attach_columns() when the pool starts
+worker_columns = {}
+worker_order = None
+worker_blocks = []
+# Codes of the categories meeting a condition, per worker and condition
+worker_matching_codes = {}
+
+
+# FUNCTIONS #
+def share_array(values, blocks):
+    # A copy of values in a new shared memory block, described by (name, dtype, shape)
+    values = np.ascontiguousarray(values)
+    block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+    np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+    blocks.append(block)
+    return block.name, values.dtype.str, values.shape
+
+
+def attached_array(description):
+    name, dtype, shape = description
+    block = shared_memory.SharedMemory(name=name)
+    # The block must stay open for as long as the array is used
+    worker_blocks.append(block)
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def attach_columns(columns, order):
+    # Pool initializer, run once in every worker
+    global worker_order
+    for column, (values, missing, categories) in columns.items():
+        worker_columns[column] = (attached_array(values), None if missing is None else attached_array(missing), categories)
+    worker_order = None if order is None else attached_array(order)
+
+
+def column_values(dataset, column):
+    # (values, missing mask or None, categories or None) of a column, as plain numpy arrays
+    series = dataset[column]
+    if series.dtype == "category":
+        return np.asarray(series.array.codes), None, series.cat.categories.tolist()
+    if isinstance(series.array, pd.arrays.IntegerArray):
+        return series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0), series.isna().to_numpy(), None
+    return series.to_numpy(), None, None
+
+
+def matching_codes(condition, categories):
+    key = condition.key()
+    if key not in worker_matching_codes:
+        worker_matching_codes[key] = np.array([code for code, value in enumerate(categories) if condition.matches(value)],
+            dtype=np.int64)
+    return worker_matching_codes[key]
+
+
+def is_number(value):
+    return value is None or (isinstance(value, (int, float, np.number)) and not isinstance(value, bool))
+
+
+def condition_mask(condition, values, missing, categories):
+    # True for the rows of values meeting condition
+    if categories is not None:
+        return np.isin(values, matching_codes(condition, categories))
+    # Numbers compared with a numeric column are compared on the whole array at once
+    numeric = values.dtype.kind in "iuf"
+    if numeric and isinstance(condition, Equals) and not condition.ignore_case and is_number(condition.value):
+        mask = values == condition.value
+    elif numeric and isinstance(condition, Between) and is_number(condition.low) and is_number(condition.high):
+        mask = np.ones(len(values), dtype=bool)
+        if condition.low is not None:
+            mask &= values >= condition.low
+        if condition.high is not None:
+            mask &= values <= condition.high
+    elif numeric and isinstance(condition, OneOf) and not condition.ignore_case and all(map(is_number, condition.values)):
+        mask = np.isin(values, condition.values)
+    else:
+        # Anything else is tested once per distinct value, as the index does
+        present = np.unique(values if missing is None else values[~missing])
+        mask = np.isin(values, [value for value in present if condition.matches(value)])
+    if missing is not None:
+        mask &= ~missing
+    return np.asarray(mask, dtype=bool)
+
+
+def partition_rows(bounds):
+    # The row positions of a partition: a range of rows, or a slice of the year order
+    start, stop = bounds
+    if worker_order is None:
+        return np.arange(start, stop)
+    return worker_order[start:stop]
+
+
+def partition_mask(conditions, bounds):
+    start, stop = bounds
+    rows = None if worker_order is None else worker_order[start:stop]
+    mask = np.ones(stop - start, dtype=bool)
+    for condition in conditions:
+        values, missing, categories = worker_columns[condition.column]
+        if rows is None:
+            values = values[start:stop]
+            missing = None if missing is None else missing[start:stop]
+        else:
+            values = values[rows]
+            missing = None if missing is None else missing[rows]
+        mask &= condition_mask(condition, values, missing, categories)
+    return mask
+
+
+def partition_positions(task):
+    conditions, bounds = task
+    return partition_rows(bounds)[partition_mask(conditions, bounds)]
+
+
+def partition_counts(task):
+    # Matching rows of every query in one partition, None for a query the partition cannot match
+    queries, bounds = task
+    return [0 if conditions is None else int(partition_mask(conditions, bounds).sum()) for conditions in queries]
+
+
+def partition_groups(task):
+    # Rows per combination of group codes among the matching rows of a partition
+    conditions, bounds, group_columns, strides, combinations = task
+    rows = partition_rows(bounds)[partition_mask(conditions, bounds)]
+    combined = np.zeros(len(rows), dtype=np.int64)
+    present = np.ones(len(rows), dtype=bool)
+    for column, stride in zip(group_columns, strides):
+        codes = worker_columns[column][0][rows]
+        present &= codes >= 0
+        combined += codes.astype(np.int64) * stride
+    return np.bincount(combined[present], minlength=combinations)
+
+
+def may_match(condition, low, high):
+    # False only when no value between low and high can meet condition
+    try:
+        if isinstance(condition, Equals) and not condition.ignore_case:
+            return low <= condition.value <= high
+        if isinstance(condition, Between):
+            return (condition.low is None or high >= condition.low) and (condition.high is None or low <= condition.high)
+        if isinstance(condition, OneOf) and not condition.ignore_case:
+            return any(low <= value <= high for value in condition.values)
+    except TypeError:
+        # A value of another type, such as text compared with a numeric column
+        pass
+    return True
+
+
+# CLASSES #
+class ParallelEngine:
+    def __init__(self, dataset, workers=None, partition_by="rows", group_columns=()):
+        # group_columns are the columns group_counts() will be asked for, which can then be
+        # shared before the pool starts rather than restarting it on the first group count
+        if partition_by not in PARTITIONS:
+            raise ValueError(f"Unknown partitioning {partition_by}, use one of {', '.join(PARTITIONS)}")
+        self.dataset = dataset
+        self.workers = workers or os.cpu_count() or 1
+        self.partition_by = partition_by
+        self.blocks = []
+        self.pool = None
+        # Partitions skipped by the last query thanks to their min/max statistics
+        self.skipped = 0
+        try:
+            self.share_columns()
+            for column in group_columns:
+                self.group_codes(column)
+            self.make_partitions()
+        except Exception:
+            self.close()
+            raise
+
+    def share_columns(self):
+        self.columns = {column: column_values(self.dataset, column) for column in self.dataset.columns}
+        self.shared_columns = {}
+        for column, (values, missing, categories) in self.columns.items():
+            self.shared_columns[column] = (share_array(values, self.blocks),
+                None if missing is None else share_array(missing, self.blocks), categories)
+        # Labels of the codes of every column that can be grouped by. Categorical columns
+        # are listed here, other columns get codes the first time they are grouped by
+        self.group_labels = {column: self.dataset[column].cat.categories
+            for column, (_, _, categories) in self.columns.items() if categories is not None}
+
+    def make_partitions(self):
+        row_count = len(self.dataset)
+        self.shared_order = None
+        if self.partition_by == "Year":
+            years, missing, _ = self.columns["Year"]
+            keys = years if missing is None else np.where(missing, np.iinfo(np.int64).max, years.astype(np.int64))
+            # A stable sort keeps the rows of each year in ascending order
+            order = np.argsort(keys, kind="stable")
+            self.shared_order = share_array(order, self.blocks)
+            ends = np.flatnonzero(np.diff(keys[order])) + 1
+            edges = np.concatenate(([0], ends, [row_count]))
+        else:
+            count = min(max(1, self.workers * PARTITIONS_PER_WORKER), max(1, row_count))
+            edges = np.linspace(0, row_count, count + 1).astype(np.int64)
+            order = None
+        self.partitions = [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+        self.statistics = [self.partition_statistics(order, bounds) for bounds in self.partitions]
+
+    def partition_statistics(self, order, bounds):
+        # column -> (min, max) of the values present in a partition, for numeric columns
+        start, stop = bounds
+        statistics = {}
+        for column, (values, missing, categories) in self.columns.items():
+            if categories is not None or values.dtype.kind not in "iuf":
+                continue
+            rows = slice(start, stop) if order is None else order[start:stop]
+            present = values[rows] if missing is None else values[rows][~missing[rows]]
+            if present.dtype.kind == "f":
+                present = present[~np.isnan(present)]
+            if len(present) > 0:
+                statistics[column] = (present.min().item(), present.max().item())
+            else:
+                statistics[column] = None
+        return statistics
+
+    def workers_pool(self):
+        # The pool is only started when the first query is run, once every column it needs is shared
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers, initializer=attach_columns,
+                initargs=(self.shared_columns, self.shared_order))
+        return self.pool
+
+    def stop_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def may_match(self, number, query):
+        # False when the statistics of partition number rule out every row
+        statistics = self.statistics[number]
+        for condition in query.conditions:
+            if condition.column in statistics:
+                limits = statistics[condition.column]
+                if limits is None or not may_match(condition, *limits):
+                    return False
+        return True
+
+    def candidate_partitions(self, query):
+        numbers = [number for number in range(len(self.partitions)) if self.may_match(number, query)]
+        self.skipped = len(self.partitions) - len(numbers)
+        return numbers
+
+    def positions(self, query):
+        # Ascending row positions matching query, the same as QueryEngine.positions gives
+        if len(query) == 0:
+            self.skipped = 0
+            return np.arange(len(self.dataset))
+        numbers = self.candidate_partitions(query)
+        parts = self.workers_pool().map(partition_positions, [(query.conditions, self.partitions[number]) for number in numbers])
+        if len(parts) == 0:
+            return EMPTY_POSITIONS
+        positions = np.concatenate(parts)
+        # Row partitions come back in row order already, year partitions interleave
+        if self.shared_order is not None:
+            positions.sort()
+        return positions
+
+    def count(self, query):
+        return self.counts([query])[0]
+
+    def counts(self, queries):
+        # Row counts of many queries. Each partition answers every query in one task
+        if len(queries) == 0:
+            return []
+        tasks = []
+        for number, bounds in enumerate(self.partitions):
+            tasks.append(([query.conditions if self.may_match(number, query) else None for query in queries], bounds))
+        totals = np.zeros(len(queries), dtype=np.int64)
+        for part in self.workers_pool().imap(partition_counts, tasks):
+            totals += part
+        return totals.tolist()
+
+    def group_codes(self, column):
+        # Integer codes of a column for grouping, shared with the workers as a column of its own
+        code_column = column if column in self.group_labels else f"{column} codes"
+        if code_column not in self.shared_columns:
+            # Missing values get code -1 and are left out of the counts
+            codes, labels = pd.factorize(self.dataset[column], sort=True)
+            self.group_labels[code_column] = labels
+            self.shared_columns[code_column] = (share_array(codes, self.blocks), None, None)
+            # Workers only attach to columns when they start, so a running pool is started again
+            self.stop_pool()
+        return code_column
+
+    def group_counts(self, query, columns, include_empty=False):
+        # Rows matching query per combination of values of columns, as a DataFrame with a Count column
+        code_columns = [self.group_codes(column) for column in columns]
+        sizes = [len(self.group_labels[column]) for column in code_columns]
+        combinations = int(np.prod(sizes))
+        if combinations > MAX_GROUP_COMBINATIONS:
+            raise ValueError(f"{' x '.join(columns)} has {combinations} combinations, too many to count at once")
+        strides = [int(np.prod(sizes[number + 1:])) for number in range(len(sizes))]
+        numbers = self.candidate_partitions(query)
+        totals = np.zeros(combinations, dtype=np.int64)
+        tasks = [(query.conditions, self.partitions[number], code_columns, strides, combinations) for number in numbers]
+        for part in self.workers_pool().imap(partition_groups, tasks):
+            totals += part
+        found = np.arange(combinations) if include_empty else np.flatnonzero(totals)
+        table = {}
+        for column, code_column, stride, size in zip(columns, code_columns, strides, sizes):
+            codes = (found // stride) % size
+            if code_column == column:
+                table[column] = pd.Categorical.from_codes(codes, self.group_labels[column])
+            else:
+                table[column] = self.group_labels[code_column].take(codes)
+        table["Count"] = totals[found]
+        return pd.DataFrame(table)
+
+    def close(self):
+        self.stop_pool()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, error, traceback):
+        self.close()
+        return False
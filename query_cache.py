@@ -0,0 +1,136 @@
+# File: query_cache.py
+# Description:
+# Memoizes filter results so that cycling through the same Team/Year/Sport
+# combinations does not recompute them. Results are stored as arrays of row
+# positions, never as DataFrames. They are keyed by the normalized query: a
+# tuple of its conditions in a fixed order (see query_engine.Query.key), and
+# each condition knows how to narrow a set of rows with refine(index, positions).
+#
+# The cache is bounded by the bytes its position arrays take up and evicts
+# the least recently used result first. A query that is not cached starts
+# from the most specific cached result it narrows down (one whose filters are
+# all part of the new query, or broader versions of them such as a shorter
+# prefix), so adding a filter to a cached query only intersects the cached
+# rows with the new filter.
+
+import itertools
+import math
+import threading
+from collections import OrderedDict
+
+# CONSTANTS #
+DEFAULT_CACHE_BYTES = 64 * 2**20
+# Rough cost of the key, the dictionary slot and the array header of an entry
+ENTRY_OVERHEAD_BYTES = 200
+# Up to this many candidate keys the broader cached results are found by looking
+# up every key that key narrows, instead of scanning the whole cache
+MAX_CANDIDATE_KEYS = 256
+
+
+# FUNCTIONS #
+def normal_key(conditions):
+    # Duplicates are dropped and the order is fixed, so equal queries have equal keys
+    return tuple(sorted(set(conditions), key=repr))
+
+
+def narrows(key, base_key):
+    # True if every condition of base_key holds for all the rows key matches,
+    # because key has the same condition or a narrower one on the same column
+    return all(any(condition.narrows(base) for condition in key) for base in base_key)
+
+
+def broader_keys(key):
+    # Every key that key narrows, built from each of its conditions, a broader
+    # version of it, or leaving it out. The key itself and the empty key are skipped
+    options = [(condition,) + tuple(condition.broader()) + (None,) for condition in key]
+    for choice in itertools.product(*options):
+        conditions = [condition for condition in choice if condition is not None]
+        if 0 < len(conditions) and choice != key:
+            yield normal_key(conditions)
+
+
+# CLASSES #
+class QueryCache:
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.refinements = 0
+        # Superseded filter tasks can still be finishing on another worker thread
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            positions = self.entries.get(key)
+            if positions is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return positions
+
+    def put(self, key, positions):
+        size = positions.nbytes + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key).nbytes + ENTRY_OVERHEAD_BYTES
+            self.entries[key] = positions
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.nbytes + ENTRY_OVERHEAD_BYTES
+
+    def closest(self, key):
+        # The smallest cached result that key narrows down, or (None, None)
+        candidate_count = math.prod(len(condition.broader()) + 2 for condition in key)
+        with self.lock:
+            if candidate_count <= MAX_CANDIDATE_KEYS:
+                candidates = list(broader_keys(key))
+            else:
+                candidates = [cached_key for cached_key in self.entries if cached_key != key and narrows(key, cached_key)]
+            best_key, best_positions = None, None
+            for cached_key in candidates:
+                positions = self.entries.get(cached_key)
+                if positions is not None and (best_positions is None or len(positions) < len(best_positions)):
+                    best_key, best_positions = cached_key, positions
+            return best_key, best_positions
+
+    def query(self, index, key):
+        # Row positions matching every condition in key, None when there are none
+        if len(key) == 0:
+            return None
+        positions = self.get(key)
+        if positions is not None:
+            return positions
+
+        base_key, positions = self.closest(key)
+        if base_key is None:
+            base_key = ()
+        else:
+            with self.lock:
+                self.refinements += 1
+        # Only the conditions missing from the cached result still need applying
+        for condition in key:
+            if condition not in base_key:
+                positions = condition.refine(index, positions)
+        self.put(key, positions)
+        return positions
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refinements": self.refinements,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
@@ -0,0 +1,241 @@
+# File: query_engine.py
+# Description:
+# Headless query engine for the athlete dataset. It has no Tkinter
+# dependency, so the same filtering that drives the GUI can be used from the
+# console script, batch jobs and benchmarks.
+#
+# A Query is a set of conditions that must all hold:
+#     Equals("Team", "Germany")                  equality
+#     Equals("Sport", "rowing", ignore_case=True) case-insensitive equality
+#     Between("Age", 20, 30)                     inclusive range, either end may be None
+#     OneOf("Year", [1960, 1964, 1968])          IN-list
+#     Prefix("Team", "fra")                      starts with, case is ignored
+# for example
+#     engine = QueryEngine.from_csv("athlete_events_shortened.csv")
+#     result = engine.run(Query(Equals("Sex", "F"), Between("Year", 1960, 2000)))
+#     print(result.count(), result.frame().head())
+#
+# Conditions are answered from the per-column position index and results are
+# remembered in the query cache. A query is answered from the cached result
+# of any broader query, such as the same query with one filter less or a
+# shorter prefix, so typing one more character only re-checks the rows that
+# matched before. engine.run() returns a Result handle that does no work
+# until its rows or count are asked for.
+
+from dataset_index import DatasetIndex, intersect, union
+from query_cache import QueryCache, DEFAULT_CACHE_BYTES, normal_key
+from selection import Selection
+
+
+# CLASSES #
+class Condition:
+    # Subclasses set `column` and implement positions(index) and describe().
+    # Conditions are never changed once made, so their key is only worked out once
+    cached_key = None
+
+    def params(self):
+        return ()
+
+    def key(self):
+        if self.cached_key is None:
+            self.cached_key = (type(self).__name__, self.column) + self.params()
+        return self.cached_key
+
+    def __eq__(self, other):
+        return isinstance(other, Condition) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(repr(part) for part in self.key()[1:])})"
+
+    def refine(self, index, positions):
+        # The rows of positions (None for every row) that also meet this condition
+        if positions is None:
+            return self.positions(index)
+        return intersect(positions, self.positions(index))
+
+    def narrows(self, other):
+        # True if every row meeting this condition also meets other
+        return self == other
+
+    def broader(self):
+        # Conditions that this one narrows, most specific first
+        return ()
+
+
+class Equals(Condition):
+    def __init__(self, column, value, ignore_case=False):
+        self.column = column
+        self.value = value
+        self.ignore_case = ignore_case
+
+    def params(self):
+        if self.ignore_case:
+            return (str(self.value).casefold(), True)
+        return (self.value, False)
+
+    def positions(self, index):
+        if self.ignore_case:
+            return union(index.positions(self.column, value)
+                for value in index.values_ignoring_case(self.column, self.value))
+        return index.positions(self.column, self.value)
+
+    def refine(self, index, positions):
+        if self.ignore_case:
+            return Condition.refine(self, index, positions)
+        return index.refine(positions, self.column, self.value)
+
+    def matches(self, value):
+        # True if a row holding value in the column meets this condition
+        if self.ignore_case:
+            return str(value).casefold() == self.params()[0]
+        return value == self.value
+
+    def describe(self):
+        return f"{self.column}: {self.value}"
+
+
+class Between(Condition):
+    def __init__(self, column, low=None, high=None):
+        self.column = column
+        self.low = low
+        self.high = high
+
+    def params(self):
+        return (self.low, self.high)
+
+    def positions(self, index):
+        return union(index.positions(self.column, value) for value in index.values(self.column) if self.matches(value))
+
+    def matches(self, value):
+        return (self.low is None or value >= self.low) and (self.high is None or value <= self.high)
+
+    def describe(self):
+        return f"{self.column}: {'' if self.low is None else self.low}-{'' if self.high is None else self.high}"
+
+
+class OneOf(Condition):
+    def __init__(self, column, values, ignore_case=False):
+        self.column = column
+        self.values = tuple(values)
+        self.ignore_case = ignore_case
+
+    def params(self):
+        if self.ignore_case:
+            return (tuple(sorted({str(value).casefold() for value in self.values})), True)
+        return (tuple(sorted(set(self.values), key=repr)), False)
+
+    def positions(self, index):
+        return union(Equals(self.column, value, self.ignore_case).positions(index) for value in set(self.values))
+
+    def matches(self, value):
+        if self.ignore_case:
+            return str(value).casefold() in self.params()[0]
+        return value in self.values
+
+    def describe(self):
+        return f"{self.column}: {' or '.join(str(value) for value in self.values)}"
+
+
+class Prefix(Condition):
+    def __init__(self, column, prefix):
+        self.column = column
+        self.prefix = str(prefix)
+
+    def params(self):
+        return (self.prefix.casefold(),)
+
+    def positions(self, index):
+        return union(index.positions(self.column, value) for value in index.values_with_prefix(self.column, self.prefix))
+
+    def refine(self, index, positions):
+        if positions is None:
+            return self.positions(index)
+        return index.restrict(positions, self.column, index.values_with_prefix(self.column, self.prefix))
+
+    def matches(self, value):
+        return str(value).casefold().startswith(self.params()[0])
+
+    def narrows(self, other):
+        return (isinstance(other, Prefix) and other.column == self.column
+            and self.params()[0].startswith(other.params()[0]))
+
+    def broader(self):
+        folded = self.params()[0]
+        return [Prefix(self.column, folded[:length]) for length in range(len(folded) - 1, 0, -1)]
+
+    def describe(self):
+        return f"{self.column}: {self.prefix}..."
+
+
+class Query:
+    def __init__(self, *conditions):
+        self.conditions = normal_key(conditions)
+
+    def where(self, *conditions):
+        # Queries are never changed in place, this returns a new, narrower one
+        return Query(*(self.conditions + conditions))
+
+    def key(self):
+        return self.conditions
+
+    def describe(self):
+        return ", ".join(condition.describe() for condition in self.conditions)
+
+    def __len__(self):
+        return len(self.conditions)
+
+    def __repr__(self):
+        return f"Query({', '.join(repr(condition) for condition in self.conditions)})"
+
+
+class Result(Selection):
+    # A Selection whose positions are only worked out when first used
+    def __init__(self, engine, query):
+        self.engine = engine
+        self.query = query
+        self.dataset = engine.dataset
+        self.evaluated = None
+
+    @property
+    def positions(self):
+        if self.evaluated is None:
+            positions = self.engine.positions(self.query)
+            self.evaluated = range(len(self.dataset)) if positions is None else positions
+        return self.evaluated
+
+    def count(self):
+        return len(self.positions)
+
+    def chunks(self, size, columns=None):
+        for start in range(0, len(self), size):
+            yield self.frame(columns, start, start + size)
+
+    def export(self, path, export_format=None, columns=None, report=None):
+        from data_export import export_rows
+        return export_rows(self.dataset, self.positions, path, export_format, columns, report=report)
+
+
+class QueryEngine:
+    def __init__(self, dataset, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.dataset = dataset
+        self.index = DatasetIndex(dataset)
+        self.cache = QueryCache(cache_bytes)
+
+    @classmethod
+    def from_csv(cls, csv_path, cache_bytes=DEFAULT_CACHE_BYTES):
+        from dataset_cache import load_dataset
+        return cls(load_dataset(csv_path), cache_bytes)
+
+    def positions(self, query):
+        # Sorted row positions matching the query, or None when it has no conditions
+        return self.cache.query(self.index, query.key())
+
+    def count(self, query):
+        positions = self.positions(query)
+        return len(self.dataset) if positions is None else len(positions)
+
+    def run(self, query):
+        return Result(self, query)
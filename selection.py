@@ -0,0 +1,46 @@
+# File: selection.py
+# Description:
+# A filter result as row positions into the base dataset, which is never
+# copied or modified. Values are only materialized when they are needed, and
+# only for the rows and columns asked for: the table takes the handful of rows
+# on screen, an export takes one chunk at a time.
+
+
+# FUNCTIONS #
+def take(values, positions):
+    # values at positions, a range of every row is a slice and does not copy
+    if isinstance(positions, range):
+        return values[positions.start:positions.stop]
+    return values[positions]
+
+
+# CLASSES #
+class Selection:
+    def __init__(self, dataset, positions=None):
+        self.dataset = dataset
+        # None selects every row, a range stands in for them without allocating an array
+        if positions is None:
+            positions = range(len(dataset))
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def page(self, offset, limit):
+        # The rows offset to offset + limit as a Selection of their own. The positions are
+        # a slice of this selection's, so a page costs nothing however many rows match
+        return Selection(self.dataset, self.positions[offset:offset + limit])
+
+    def rows(self, start, stop, columns):
+        # Display values for rows start to stop of the selection, one tuple per row.
+        # Missing values are given as empty strings
+        positions = self.positions[start:stop]
+        values = [self.dataset[column].iloc[positions].to_numpy(dtype=object, na_value="").tolist() for column in columns]
+        return list(zip(*values))
+
+    def frame(self, columns=None, start=0, stop=None):
+        # A DataFrame holding copies of only the selected rows and columns
+        positions = self.positions[start:stop]
+        if columns is None:
+            return self.dataset.iloc[positions]
+        return self.dataset.iloc[positions, [self.dataset.columns.get_loc(column) for column in columns]]